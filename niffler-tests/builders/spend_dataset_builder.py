@@ -0,0 +1,75 @@
+import random
+import uuid
+from datetime import date, timedelta
+from typing import Iterator
+
+from builders.spending_builder import SpendingBuilder
+from models.data_models import CategoryRow, SpendRow
+
+
+class SpendDatasetBuilder:
+    """
+    Билдер больших наборов трат для сценариев с 10k-1M строк (categories()/spends() загружаются через SpendDb.load_dataset)
+
+    Значения берутся из тех же пулов, что и у SpendingBuilder (сам билдер на строку не создается -
+    он поднимает mimesis провайдер). Набор детерминирован seed:
+    одинаковый seed - одинаковые id, даты, суммы. Строки генерируются лениво, в памяти не хранятся.
+    """
+
+    # Доля трат по валютам: основная валюта пользователя - RUB
+    DEFAULT_CURRENCY_WEIGHTS = {"RUB": 0.7, "USD": 0.15, "EUR": 0.1, "KZT": 0.05}
+
+    def __init__(self, username: str, seed: int = 42):
+        self.username = username
+        self.seed = seed
+        self._count = 1000
+        self._days = 365
+        self._end_date = date.today()
+        self._currency_weights = dict(self.DEFAULT_CURRENCY_WEIGHTS)
+
+    def with_spends(self, count: int):
+        """Количество трат"""
+        self._count = count
+        return self
+
+    def with_period(self, days: int, end_date: date | None = None):
+        """Траты распределяются по days дням до end_date (по умолчанию - сегодня)"""
+        self._days = days
+        self._end_date = end_date or date.today()
+        return self
+
+    def with_currency_weights(self, weights: dict[str, float]):
+        """Доли валют, например {"RUB": 1.0} - только рубли"""
+        self._currency_weights = dict(weights)
+        return self
+
+    def _uuid(self, rng: random.Random) -> str:
+        return str(uuid.UUID(int=rng.getrandbits(128), version=4))
+
+    def categories(self) -> list[CategoryRow]:
+        """Категории набора - по одной на каждую категорию SpendingBuilder"""
+        rng = random.Random(f"{self.seed}:categories")
+        return [CategoryRow(self._uuid(rng), name, self.username, False) for name in SpendingBuilder.CATEGORIES]
+
+    def spends(self) -> Iterator[SpendRow]:
+        """
+        Ленивая генерация трат: недавние даты встречаются чаще (экспоненциальное распределение),
+        суммы - логнормальные, как у реальных расходов (много мелких, мало крупных)
+        """
+        rng = random.Random(f"{self.seed}:spends")
+        category_ids = [category.id for category in self.categories()]
+        currencies = list(self._currency_weights)
+        weights = list(self._currency_weights.values())
+        mean_days_ago = max(self._days / 4, 1)
+
+        for _ in range(self._count):
+            days_ago = min(int(rng.expovariate(1 / mean_days_ago)), self._days - 1)
+            yield SpendRow(
+                id=self._uuid(rng),
+                username=self.username,
+                spend_date=self._end_date - timedelta(days=days_ago),
+                currency=rng.choices(currencies, weights)[0],
+                amount=round(min(rng.lognormvariate(6, 1.2), 1_000_000), 2),
+                description=rng.choice(SpendingBuilder.DESCRIPTIONS),
+                category_id=rng.choice(category_ids),
+            )
@@ -6,6 +6,19 @@ from models.data_models import SpendingData
 class SpendingBuilder:
     """Билдер для создания тестовых данных трат"""
 
+    CURRENCIES = ["RUB", "USD", "EUR", "KZT"]
+    CATEGORIES = ["Food", "Transport", "Entertainment", "Shopping", "Health", "Bills"]
+    DESCRIPTIONS = [
+        "Lunch at restaurant",
+        "Coffee break",
+        "Grocery shopping",
+        "Bus ticket",
+        "Movie theater",
+        "Online purchase",
+        "Pharmacy",
+        "Utility bill",
+    ]
+
     def __init__(self):
         self.text = Text()
         self._amount = None
@@ -30,8 +43,7 @@ class SpendingBuilder:
 
     def with_random_currency(self):
         """Выбор случайной валюты из доступных"""
-        currencies = ["RUB", "USD", "EUR", "KZT"]
-        self._currency = random.choice(currencies)
+        self._currency = random.choice(self.CURRENCIES)
         return self
 
     def with_category(self, category):
@@ -41,15 +53,7 @@ class SpendingBuilder:
 
     def with_random_category(self):
         """Выбор случайной категории из популярных"""
-        categories = [
-            "Food",
-            "Transport",
-            "Entertainment",
-            "Shopping",
-            "Health",
-            "Bills",
-        ]
-        self._category = random.choice(categories)
+        self._category = random.choice(self.CATEGORIES)
         return self
 
     def with_description(self, description):
@@ -59,17 +63,7 @@ class SpendingBuilder:
 
     def with_random_description(self):
         """Генерация случайного описания из типичных трат"""
-        descriptions = [
-            "Lunch at restaurant",
-            "Coffee break",
-            "Grocery shopping",
-            "Bus ticket",
-            "Movie theater",
-            "Online purchase",
-            "Pharmacy",
-            "Utility bill",
-        ]
-        self._description = random.choice(descriptions)
+        self._description = random.choice(self.DESCRIPTIONS)
         return self
 
     def build(self) -> SpendingData:
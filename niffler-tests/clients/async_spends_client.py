@@ -0,0 +1,213 @@
+import asyncio
+import json
+from typing import Iterable
+
+import allure
+import httpx
+from pydantic import BaseModel
+from clients.cassette import Cassette, CassetteTransport
+from clients.http_capture import HttpCapture
+from clients.oauth_client import OAuthClient
+from clients.resilience import Resilience
+from clients.token_cache import TokenCache
+from models.data_models import BulkItemResult, Category, Spend, SpendAdd
+
+
+class AsyncSpendsHttpClient:
+    """
+    Асинхронный HTTP клиент для gateway на httpx
+
+    Все запросы идут через один AsyncClient с общим пулом соединений и keep-alive,
+    поэтому параллельные вызовы (asyncio.gather) не открывают новое TCP соединение на каждый запрос.
+    Шаги Allure внутри клиента не открываются: стек шагов allure один на поток и не знает о корутинах,
+    при asyncio.gather шаги и attachments параллельных запросов вкладывались бы друг в друга.
+    Вызывающий код открывает один шаг вокруг gather - обмены попадают в него (attach синхронный, не перемешивается).
+    """
+
+    def __init__(
+            self,
+            base_url: str,
+            token: str,
+            max_connections: int = 20,
+            max_keepalive_connections: int = 10,
+            timeout: float = 30.0,
+            capture: HttpCapture | None = None,
+            oauth_client: OAuthClient | None = None,
+            resilience: Resilience | None = None,
+            cassette: Cassette | None = None,
+            token_cache: TokenCache | None = None
+    ):
+        self.base_url = base_url
+        self.token = token
+        self.capture = capture or HttpCapture.from_env()
+        # Если передан, на 401 токен обновляется и запрос повторяется один раз
+        self.oauth_client = oauth_client
+        # Куда записать обновленный токен, чтобы его получили следующие клиенты/воркеры
+        self.token_cache = token_cache
+        self._renew_lock = asyncio.Lock()
+        # Повторы GET/DELETE на 5xx/429 и circuit breaker, общий с sync клиентом этого gateway
+        self.resilience = resilience or Resilience.from_env(base_url, (httpx.TransportError,))
+        limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections
+        )
+        self.client = httpx.AsyncClient(
+            base_url=base_url,
+            headers={
+                'Accept': 'application/json',
+                'Authorization': f'Bearer {token}',
+                'Content-Type': 'application/json'
+            },
+            limits=limits,
+            timeout=timeout,
+            # Кассета оборачивает транспорт: запись обменов на диск или воспроизведение без сети
+            transport=CassetteTransport(cassette, httpx.AsyncHTTPTransport(limits=limits)) if cassette else None
+        )
+
+    async def __aenter__(self) -> "AsyncSpendsHttpClient":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.aclose()
+
+    async def aclose(self) -> None:
+        """Закрытие пула соединений"""
+        await self.client.aclose()
+
+    async def _request(self, method: str, endpoint: str, **kwargs) -> httpx.Response:
+        """Запрос с однократным повтором после обновления токена на 401"""
+        token = self.token
+        response = await self.client.request(method, endpoint, **kwargs)
+        if response.status_code == 401 and self.oauth_client:
+            await self._renew_token(token)
+            response = await self.client.request(method, endpoint, **kwargs)
+        return response
+
+    async def _renew_token(self, expired_token: str) -> None:
+        """
+        Обновление токена; параллельные задачи, получившие 401, обновляют его только один раз.
+        Более новый токен OAuthClient (обновлен другим клиентом) берется без повторного логина
+        """
+        async with self._renew_lock:
+            if self.token != expired_token:
+                return
+            if self.oauth_client.token and self.oauth_client.token != expired_token:
+                self.token = self.oauth_client.token
+            else:
+                self.token = await asyncio.to_thread(self.oauth_client.refresh)
+                if self.token_cache:
+                    self.token_cache.put(
+                        self.oauth_client.auth_url, self.oauth_client.username, self.oauth_client.token_data
+                    )
+            self.client.headers['Authorization'] = f'Bearer {self.token}'
+
+    async def _make_request(self, method: str, endpoint: str, **kwargs) -> httpx.Response:
+        """Базовый метод для HTTP запросов с attachments по политике self.capture"""
+        url = f"{self.base_url}{endpoint}"
+
+        try:
+            response = await self.resilience.acall(method, lambda: self._request(method, endpoint, **kwargs))
+        except httpx.TransportError as e:
+            self.capture.record(method, url, kwargs.get('json'), None, str(e).encode())
+            raise
+
+        self.capture.record(method, url, kwargs.get('json'), response.status_code, response.content)
+
+        response.raise_for_status()
+        return response
+
+    async def get_categories(self) -> list[Category]:
+        response = await self._make_request("GET", "/api/categories/all")
+        return [Category.model_validate(item) for item in response.json()]
+
+    async def add_spend(self, spend: SpendAdd) -> Spend:
+        response = await self._make_request("POST", "/api/spends/add", json=spend.model_dump())
+        return Spend.model_validate(response.json())
+
+    async def add_category(self, name: str) -> Category:
+        response = await self._make_request("POST", "/api/categories/add", json={"name": name})
+        return Category.model_validate(response.json())
+
+    async def get_spends(self) -> list[Spend]:
+        response = await self._make_request("GET", "/api/spends/all")
+        return [Spend.model_validate(item) for item in response.json()]
+
+    async def remove_spends(self, ids: list[str]) -> None:
+        await self._make_request("DELETE", "/api/spends/remove", params={"ids": ids})
+
+    async def remove_categories(self, category_ids: list[str]) -> None:
+        for category_id in category_ids:
+            try:
+                await self._make_request("DELETE", f"/api/categories/{category_id}")
+            except httpx.HTTPStatusError as e:
+                allure.attach(f"Ошибка удаления {category_id}: {e}", name="Error",
+                              attachment_type=allure.attachment_type.TEXT)
+
+    async def remove_spend(self, spend_id: str) -> None:
+        """Удалить одну трату по ID"""
+        await self.remove_spends([spend_id])
+
+    async def _bulk(
+            self,
+            endpoint: str,
+            payloads: list[dict],
+            model: type[BaseModel],
+            concurrency: int,
+            retries: int
+    ) -> list[BulkItemResult]:
+        """POST каждого payload с ограничением числа одновременных запросов"""
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def send(index: int, payload: dict) -> BulkItemResult:
+            attempts = 0
+
+            async def attempt() -> httpx.Response:
+                nonlocal attempts
+                attempts += 1
+                return await self._request("POST", endpoint, json=payload)
+
+            async with semaphore:
+                try:
+                    # POST здесь повторяем явно: seed данных, дубль при 5xx допустим
+                    response = await self.resilience.acall("POST", attempt, retryable=True, retries=retries)
+                    self.capture.record("POST", str(response.url), payload, response.status_code, response.content)
+                    response.raise_for_status()
+                    return BulkItemResult(index=index, result=model.model_validate(response.json()), attempts=attempts)
+                except Exception as e:
+                    return BulkItemResult(index=index, error=f"{type(e).__name__}: {e}", attempts=attempts)
+
+        results = await asyncio.gather(*(send(i, payload) for i, payload in enumerate(payloads)))
+
+        failed = [r for r in results if not r.ok]
+        allure.attach(
+            json.dumps({
+                "total": len(results),
+                "succeeded": len(results) - len(failed),
+                "failed": len(failed),
+                "retried": sum(1 for r in results if r.attempts > 1),
+                "errors": {r.index: r.error for r in failed[:50]},
+            }, indent=2, ensure_ascii=False),
+            name="Bulk Summary",
+            attachment_type=allure.attachment_type.JSON
+        )
+        return list(results)
+
+    async def add_spends_bulk(
+            self,
+            spends: Iterable[SpendAdd],
+            concurrency: int = 10,
+            retries: int = 3
+    ) -> list[BulkItemResult]:
+        """Параллельное добавление трат, результаты в порядке входных данных"""
+        payloads = [spend.model_dump() for spend in spends]
+        return await self._bulk("/api/spends/add", payloads, Spend, concurrency, retries)
+
+    async def add_categories_bulk(
+            self,
+            names: Iterable[str],
+            concurrency: int = 10,
+            retries: int = 3
+    ) -> list[BulkItemResult]:
+        """Параллельное добавление категорий, результаты в порядке входных данных"""
+        payloads = [{"name": name} for name in names]
+        return await self._bulk("/api/categories/add", payloads, Category, concurrency, retries)
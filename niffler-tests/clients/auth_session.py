@@ -1,19 +1,31 @@
 import requests
 from urllib.parse import urljoin, parse_qs, urlparse
+from clients.cassette import Cassette, CassetteAdapter
+from clients.resilience import Resilience
 
 
 class AuthSession(requests.Session):
-    def __init__(self, auth_url: str):
+    def __init__(self, auth_url: str, cassette: Cassette | None = None):
         super().__init__()
         self.auth_url = auth_url
         self.code = None
+        # Запись/воспроизведение обменов с auth-сервисом (редиректы с code тоже воспроизводятся)
+        if cassette:
+            self.mount('http://', CassetteAdapter(cassette))
+            self.mount('https://', CassetteAdapter(cassette))
+        # Повторы идемпотентных запросов и circuit breaker для auth-сервиса
+        self.resilience = Resilience.from_env(
+            auth_url, (requests.exceptions.ConnectionError, requests.exceptions.Timeout)
+        )
 
     def request(self, method, url, *args, **kwargs):
         # Автоматически добавляем базовый URL, если путь относительный
         full_url = url if url.startswith('http') else urljoin(self.auth_url, url)
 
         # Выполняем запрос
-        response = super().request(method, full_url, *args, **kwargs)
+        response = self.resilience.call(
+            method, lambda: super(AuthSession, self).request(method, full_url, *args, **kwargs)
+        )
 
         # "Ловим" code из URL редиректа
         if response.history:
@@ -24,3 +36,25 @@ class AuthSession(requests.Session):
                     self.code = query_params.get('code', [None])[0]
                     break
         return response
+
+    def register(self, username: str, password: str) -> bool:
+        """
+        Регистрация через форму /register без браузера
+
+        Returns:
+            bool: True если пользователь создан (201), False если уже существует или данные невалидны (400)
+        """
+        # GET выставляет cookie XSRF-TOKEN, который форма отправляет как _csrf
+        self.get('/register')
+        response = self.post(
+            '/register',
+            data={
+                'username': username,
+                'password': password,
+                'passwordSubmit': password,
+                '_csrf': self.cookies.get('XSRF-TOKEN'),
+            }
+        )
+        if response.status_code not in (201, 400):
+            response.raise_for_status()
+        return response.status_code == 201
@@ -0,0 +1,104 @@
+import json
+import os
+import time
+from pathlib import Path
+
+import allure
+import requests
+from clients.auth_session import AuthSession
+from clients.oauth_client import OAuthClient, OAuthToken
+from clients.token_cache import TokenCache
+from utils.file_lock import atomic_write_text
+
+
+def storage_state_from_token(environment: dict, token: OAuthToken) -> dict:
+    """
+    Playwright storage state без UI логина: фронтенд хранит id_token/access_token в localStorage
+    и ходит в gateway с id_token, поэтому достаточно положить туда токены из OAuth ответа
+    """
+    return {
+        "cookies": [],
+        "origins": [{
+            "origin": environment["frontend_url"].rstrip("/"),
+            "localStorage": [
+                {"name": "id_token", "value": token.id_token or token.access_token},
+                {"name": "access_token", "value": token.access_token},
+            ],
+        }],
+    }
+
+
+def prelogin(environment: dict, username: str, password: str, state_file: Path) -> Path:
+    """Регистрация (если пользователя еще нет) и логин по HTTP: токен в TokenCache, storage state - атомарно в файл"""
+    AuthSession(environment["auth_url"]).register(username, password)
+    oauth_client = OAuthClient(config=environment)
+    oauth_client.get_token(username, password)
+    # Воркер возьмет этот токен в api_token из кэша, без своего логина
+    TokenCache().put(environment["auth_url"], username, oauth_client.token_data)
+    atomic_write_text(Path(state_file), json.dumps(storage_state_from_token(environment, oauth_client.token_data), indent=2))
+    return Path(state_file)
+
+
+class AuthStateValidator:
+    """
+    Проверка Playwright storage state без загрузки SPA
+
+    Фронтенд хранит id_token в localStorage и ходит с ним в gateway, поэтому состояние валидно,
+    пока не истек id_token (claim exp) и cookies. При verify_session дополнительно делается
+    один запрос /api/session/current в gateway - он отдает username только для действующего токена.
+    """
+
+    def __init__(self, environment: dict, min_ttl: int = 60, verify_session: bool = False):
+        self.environment = environment
+        self.min_ttl = min_ttl
+        self.verify_session = verify_session
+
+    @classmethod
+    def from_env(cls, environment: dict) -> "AuthStateValidator":
+        """Режим из AUTH_STATE_CHECK: jwt (только сроки в файле) или session (плюс запрос в gateway)"""
+        return cls(environment, verify_session=os.getenv("AUTH_STATE_CHECK", "jwt").lower() == "session")
+
+    def _id_token(self, state: dict) -> str | None:
+        frontend_origin = self.environment["frontend_url"].rstrip("/")
+        for origin in state.get("origins", []):
+            if origin.get("origin", "").rstrip("/") == frontend_origin:
+                for item in origin.get("localStorage", []):
+                    if item["name"] == "id_token":
+                        return item["value"]
+        return None
+
+    def _cookies_alive(self, state: dict) -> bool:
+        # expires = -1 у session cookie - они живут, пока жив контекст
+        deadline = time.time() + self.min_ttl
+        return all(cookie.get("expires", -1) < 0 or cookie["expires"] > deadline for cookie in state.get("cookies", []))
+
+    def _session_username(self, id_token: str) -> str | None:
+        response = requests.get(
+            f"{self.environment['gateway_url']}/api/session/current",
+            headers={"Authorization": f"Bearer {id_token}", "Accept": "application/json"},
+            timeout=5,
+        )
+        return response.json().get("username") if response.ok else None
+
+    def is_valid(self, state_file: Path) -> bool:
+        """Состояние можно использовать без повторного логина через UI"""
+        with allure.step("Проверка сохраненной авторизации"):
+            try:
+                state = json.loads(Path(state_file).read_text(encoding="utf-8"))
+            except (FileNotFoundError, json.JSONDecodeError):
+                return False
+
+            id_token = self._id_token(state)
+            exp = TokenCache.jwt_exp(id_token) if id_token else None
+            if exp is None or exp - time.time() <= self.min_ttl or not self._cookies_alive(state):
+                allure.attach(f"id_token exp: {exp}", name="Auth State Expired")
+                return False
+
+            if self.verify_session:
+                try:
+                    username = self._session_username(id_token)
+                except requests.exceptions.RequestException:
+                    return False
+                allure.attach(f"Session username: {username}", name="Auth State Session")
+                return username is not None
+            return True
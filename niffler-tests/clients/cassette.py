@@ -0,0 +1,214 @@
+import base64
+import hashlib
+import json
+import os
+import threading
+from collections import defaultdict, deque
+from enum import Enum
+from http.client import HTTPMessage
+from types import SimpleNamespace
+from pathlib import Path
+from urllib.parse import urlsplit
+
+import httpx
+import requests
+from requests.adapters import BaseAdapter, HTTPAdapter
+from requests.cookies import extract_cookies_to_jar
+from requests.structures import CaseInsensitiveDict
+from exceptions import CassetteMissError
+
+# Тело хранится уже декодированным, поэтому заголовки кодирования/длины не сохраняем
+_SKIP_HEADERS = {"content-encoding", "transfer-encoding", "content-length", "connection", "keep-alive"}
+# Set-Cookie в словаре заголовков склеивается через запятую (а она есть в expires), поэтому хранится списком
+_SET_COOKIE = "set-cookie"
+
+
+class CassetteMode(str, Enum):
+    OFF = "off"
+    RECORD = "record"  # запросы идут в сеть и записываются в кассету
+    REPLAY = "replay"  # ответы берутся из кассеты, сеть не используется
+
+
+class Cassette:
+    """
+    Запись HTTP обменов на диск и их воспроизведение без сети
+
+    Запрос сопоставляется по (method, path, query, тело); если точного совпадения нет
+    (PKCE code_challenge, _csrf, code, username меняются от запуска к запуску) - по (method, path)
+    в порядке записи. Последний ответ для ключа повторяется, когда записи закончились.
+    """
+
+    def __init__(self, path: Path | str, mode: CassetteMode = CassetteMode.REPLAY):
+        self.path = Path(path)
+        self.mode = CassetteMode(mode)
+        self.interactions: list[dict] = []
+        self._lock = threading.Lock()
+        self._exact: dict[tuple, deque] = defaultdict(deque)
+        self._by_path: dict[tuple, deque] = defaultdict(deque)
+        if self.mode == CassetteMode.REPLAY:
+            self._load()
+
+    @classmethod
+    def from_env(cls, name: str) -> "Cassette | None":
+        """Кассета по имени из HTTP_CASSETTE_DIR в режиме HTTP_CASSETTE_MODE (off - None)"""
+        mode = CassetteMode(os.getenv("HTTP_CASSETTE_MODE", CassetteMode.OFF.value))
+        if mode == CassetteMode.OFF:
+            return None
+        safe_name = "".join(c if c.isalnum() or c in "-_." else "_" for c in name)
+        return cls(Path(os.getenv("HTTP_CASSETTE_DIR", "cassettes")) / f"{safe_name}.json", mode)
+
+    @staticmethod
+    def _body_hash(body: bytes | None) -> str:
+        return hashlib.sha1(body or b"").hexdigest()
+
+    @staticmethod
+    def _encode_body(body: bytes) -> dict:
+        try:
+            return {"body": body.decode("utf-8")}
+        except UnicodeDecodeError:
+            return {"body_base64": base64.b64encode(body).decode()}
+
+    @staticmethod
+    def _decode_body(data: dict) -> bytes:
+        if "body_base64" in data:
+            return base64.b64decode(data["body_base64"])
+        return data.get("body", "").encode("utf-8")
+
+    def _load(self) -> None:
+        if not self.path.exists():
+            raise CassetteMissError(str(self.path), "кассета не найдена - сначала запустите с HTTP_CASSETTE_MODE=record")
+        self.interactions = json.loads(self.path.read_text(encoding="utf-8"))
+        for interaction in self.interactions:
+            request = interaction["request"]
+            path_key = (request["method"], request["path"])
+            self._by_path[path_key].append(interaction["response"])
+            self._exact[(*path_key, request["query"], request["body_hash"])].append(interaction["response"])
+
+    def record(self, method: str, url: str, body: bytes | None, status: int, headers: dict, content: bytes,
+               set_cookie: list[str] | None = None) -> None:
+        parts = urlsplit(url)
+        with self._lock:
+            self.interactions.append({
+                "request": {
+                    "method": method.upper(),
+                    "path": parts.path,
+                    "query": parts.query,
+                    "body_hash": self._body_hash(body),
+                    **({"json": json.loads(body)} if body and body[:1] in (b"{", b"[") else {}),
+                },
+                "response": {
+                    "status": status,
+                    "headers": {k: v for k, v in headers.items() if k.lower() not in _SKIP_HEADERS | {_SET_COOKIE}},
+                    **({"set_cookie": set_cookie} if set_cookie else {}),
+                    **self._encode_body(content),
+                },
+            })
+
+    def play(self, method: str, url: str, body: bytes | None) -> tuple[int, dict, bytes, list[str]]:
+        parts = urlsplit(url)
+        path_key = (method.upper(), parts.path)
+        with self._lock:
+            queue = self._exact.get((*path_key, parts.query, self._body_hash(body))) or self._by_path.get(path_key)
+            if not queue:
+                raise CassetteMissError(str(self.path), f"нет записи для {path_key[0]} {path_key[1]}")
+            response = queue.popleft() if len(queue) > 1 else queue[0]
+        return response["status"], response["headers"], self._decode_body(response), response.get("set_cookie", [])
+
+    def save(self) -> None:
+        if self.mode != CassetteMode.RECORD:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._lock:
+            self.path.write_text(json.dumps(self.interactions, indent=2, ensure_ascii=False), encoding="utf-8")
+
+    def to_wiremock(self, mappings_dir: Path | str) -> list[Path]:
+        """Экспорт записей в маппинги WireMock (формат wiremock/rest/mappings)"""
+        mappings_dir = Path(mappings_dir)
+        mappings_dir.mkdir(parents=True, exist_ok=True)
+        files = []
+        for index, interaction in enumerate(self.interactions):
+            request, response = interaction["request"], interaction["response"]
+            mapping = {
+                "request": {"method": request["method"], **(
+                    {"url": f"{request['path']}?{request['query']}"} if request["query"]
+                    else {"urlPath": request["path"]}
+                )},
+                "response": {
+                    "status": response["status"],
+                    "headers": {**response["headers"], **(
+                        {"Set-Cookie": response["set_cookie"]} if response.get("set_cookie") else {}
+                    )},
+                    **({"base64Body": response["body_base64"]} if "body_base64" in response
+                       else {"body": response.get("body", "")}),
+                },
+            }
+            if "json" in request:
+                mapping["request"]["bodyPatterns"] = [{"equalToJson": request["json"]}]
+            file = mappings_dir / f"{self.path.stem}_{index:03d}.json"
+            file.write_text(json.dumps(mapping, indent=2, ensure_ascii=False), encoding="utf-8")
+            files.append(file)
+        return files
+
+
+class CassetteAdapter(BaseAdapter):
+    """Transport adapter для requests.Session: session.mount('http://', CassetteAdapter(cassette))"""
+
+    def __init__(self, cassette: Cassette):
+        super().__init__()
+        self.cassette = cassette
+        self.real_adapter = HTTPAdapter()
+
+    def send(self, request: requests.PreparedRequest, **kwargs) -> requests.Response:
+        body = request.body.encode() if isinstance(request.body, str) else request.body
+        if self.cassette.mode == CassetteMode.REPLAY:
+            status, headers, content, set_cookie = self.cassette.play(request.method, request.url, body)
+            response = requests.Response()
+            response.status_code = status
+            response.headers = CaseInsensitiveDict(headers)
+            # Session берет cookies из raw._original_response.msg - без сети подкладываем записанные Set-Cookie
+            message = HTTPMessage()
+            for cookie in set_cookie:
+                message.add_header("Set-Cookie", cookie)
+            response.raw = SimpleNamespace(_original_response=SimpleNamespace(msg=message))
+            extract_cookies_to_jar(response.cookies, request, response.raw)
+            response._content = content
+            response._content_consumed = True
+            response.url = request.url
+            response.request = request
+            response.encoding = requests.utils.get_encoding_from_headers(response.headers)
+            return response
+
+        response = self.real_adapter.send(request, **kwargs)
+        self.cassette.record(request.method, request.url, body, response.status_code,
+                             dict(response.headers), response.content, response.raw.headers.getlist("Set-Cookie"))
+        return response
+
+    def close(self) -> None:
+        self.real_adapter.close()
+
+
+class CassetteTransport(httpx.AsyncBaseTransport):
+    """Transport для httpx.AsyncClient(transport=CassetteTransport(cassette))"""
+
+    def __init__(self, cassette: Cassette, real_transport: httpx.AsyncBaseTransport | None = None):
+        self.cassette = cassette
+        self.real_transport = real_transport or httpx.AsyncHTTPTransport()
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        body = await request.aread()
+        if self.cassette.mode == CassetteMode.REPLAY:
+            status, headers, content, set_cookie = self.cassette.play(request.method, str(request.url), body)
+            headers = [*headers.items(), *((_SET_COOKIE, cookie) for cookie in set_cookie)]
+            return httpx.Response(status, headers=headers, content=content, request=request)
+
+        response = await self.real_transport.handle_async_request(request)
+        content = await response.aread()
+        headers = {k: v for k, v in response.headers.items() if k.lower() not in _SKIP_HEADERS | {_SET_COOKIE}}
+        set_cookie = response.headers.get_list(_SET_COOKIE)
+        self.cassette.record(request.method, str(request.url), body, response.status_code, headers, content, set_cookie)
+        headers = [*headers.items(), *((_SET_COOKIE, cookie) for cookie in set_cookie)]
+        return httpx.Response(response.status_code, headers=headers, content=content, request=request)
+
+    async def aclose(self) -> None:
+        await self.real_transport.aclose()
+
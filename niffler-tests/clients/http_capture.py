@@ -0,0 +1,94 @@
+import json
+import os
+import random
+from collections import deque
+from dataclasses import dataclass
+from enum import Enum
+from typing import Any
+
+import allure
+
+
+class CapturePolicy(str, Enum):
+    """Когда HTTP запросы/ответы попадают в Allure"""
+    ALWAYS = "always"  # каждый запрос целиком
+    ON_FAILURE = "on_failure"  # только при ошибке запроса или падении теста
+    SAMPLED = "sampled"  # случайная доля запросов + все ошибки
+    TRUNCATED = "truncated"  # каждый запрос, тело обрезано до max_bytes
+
+
+@dataclass
+class HttpExchange:
+    """Запрос/ответ в сыром виде - тело декодируется только при выгрузке в Allure"""
+    method: str
+    url: str
+    request_json: Any
+    status: int | None
+    response_body: bytes
+
+
+class HttpCapture:
+    """
+    Буфер HTTP обменов клиента с политикой выгрузки в Allure
+
+    Тела ответов хранятся в памяти как bytes и пишутся на диск только если политика требует,
+    запрос упал, или тест упал (flush_pending из pytest_runtest_makereport)
+    """
+
+    def __init__(
+            self,
+            policy: CapturePolicy = CapturePolicy.ALWAYS,
+            max_bytes: int = 65536,
+            sample_rate: float = 0.1,
+            buffer_size: int = 50,
+            rng: random.Random | None = None
+    ):
+        self.policy = CapturePolicy(policy)
+        self.max_bytes = max_bytes
+        self.sample_rate = sample_rate
+        # Свой генератор для выборки sampled - с seed выборка воспроизводима
+        self.rng = rng or random.Random()
+        self.pending: deque[HttpExchange] = deque(maxlen=buffer_size)
+
+    @classmethod
+    def from_env(cls) -> "HttpCapture":
+        """Политика из переменных окружения HTTP_CAPTURE_*"""
+        return cls(
+            policy=CapturePolicy(os.getenv("HTTP_CAPTURE_POLICY", CapturePolicy.ALWAYS.value)),
+            max_bytes=int(os.getenv("HTTP_CAPTURE_MAX_BYTES", "65536")),
+            sample_rate=float(os.getenv("HTTP_CAPTURE_SAMPLE_RATE", "0.1")),
+        )
+
+    def record(self, method: str, url: str, request_json: Any, status: int | None, response_body: bytes) -> None:
+        """Зафиксировать обмен и выгрузить его сразу, если этого требует политика"""
+        exchange = HttpExchange(method.upper(), url, request_json, status, response_body)
+        failed = status is None or status >= 400
+
+        if failed or self.policy in (CapturePolicy.ALWAYS, CapturePolicy.TRUNCATED):
+            self._attach(exchange)
+        elif self.policy == CapturePolicy.SAMPLED and self.rng.random() < self.sample_rate:
+            self._attach(exchange)
+        else:
+            self.pending.append(exchange)
+
+    def flush_pending(self) -> None:
+        """Выгрузить отложенные обмены (вызывается при падении теста)"""
+        while self.pending:
+            self._attach(self.pending.popleft())
+
+    def _attach(self, exchange: HttpExchange) -> None:
+        limit = None if self.policy == CapturePolicy.ALWAYS else self.max_bytes
+
+        allure.attach(exchange.url, name=f"{exchange.method} URL", attachment_type=allure.attachment_type.TEXT)
+        if exchange.request_json is not None:
+            allure.attach(self._truncate(json.dumps(exchange.request_json, ensure_ascii=False).encode(), limit),
+                          name="Request Body", attachment_type=allure.attachment_type.JSON)
+        allure.attach(str(exchange.status), name="Status", attachment_type=allure.attachment_type.TEXT)
+        allure.attach(self._truncate(exchange.response_body, limit),
+                      name="Response", attachment_type=allure.attachment_type.JSON)
+
+    @staticmethod
+    def _truncate(body: bytes, limit: int | None) -> str:
+        if limit is None or len(body) <= limit:
+            return body.decode(errors="replace")
+        return body[:limit].decode(errors="replace") + f"\n... [обрезано, всего {len(body)} байт]"
@@ -3,6 +3,7 @@ import allure
 from urllib.parse import urljoin
 from pydantic import BaseModel, Field
 from clients.auth_session import AuthSession
+from clients.cassette import Cassette
 
 
 class OAuthRequest(BaseModel):
@@ -14,17 +15,39 @@ class OAuthRequest(BaseModel):
     code_challenge_method: str = Field(default="S256")
 
 
+class OAuthToken(BaseModel):
+    """Ответ /oauth2/token"""
+    access_token: str
+    refresh_token: str | None = None
+    id_token: str | None = None
+    token_type: str | None = None
+    expires_in: int | None = None
+
+
 class OAuthClient:
     """Авторизация по OAuth 2.0 (Authorization Code Flow with PKCE)"""
 
-    def __init__(self, config: dict):
-        self.session = AuthSession(auth_url=config["auth_url"])
+    def __init__(self, config: dict, username: str = None, password: str = None, cassette: Cassette | None = None):
+        self.auth_url = config["auth_url"]
+        self.session = AuthSession(auth_url=config["auth_url"], cassette=cassette)
         self.redirect_uri = urljoin(config["frontend_url"], '/authorized')
         self.token = None
+        self.token_data: OAuthToken | None = None
+        # Учетные данные запоминаются для повторного логина в refresh()
+        self.username = username
+        self.password = password
         self.code_verifier, self.code_challenge = pkce.generate_pkce_pair()
 
+    def use_token(self, token_data: OAuthToken) -> None:
+        """Подставить ранее полученный токен (например, из TokenCache)"""
+        self.token_data = token_data
+        self.token = token_data.access_token
+
     def get_token(self, username: str, password: str) -> str:
         """Получение access_token путем симуляции логина пользователя"""
+        self.username, self.password = username, password
+        self.session.code = None
+
         with allure.step("Шаг 1: Запрос на страницу авторизации для получения cookies"):
             self.session.get(
                 url='/oauth2/authorize',
@@ -58,7 +81,38 @@ class OAuthClient:
                 }
             )
             token_response.raise_for_status()
-            self.token = token_response.json().get('access_token')
-            if not self.token:
-                raise ValueError("Не удалось получить access_token из ответа сервера")
-            return self.token
+            return self._store_token(token_response.json())
+
+    @allure.step("Обновление access_token")
+    def refresh(self) -> str:
+        """
+        Обновление access_token через grant_type=refresh_token.
+        Публичному клиенту niffler auth-сервер refresh_token не выдает - тогда повторяем PKCE логин
+        с запомненными учетными данными
+        """
+        if self.token_data and self.token_data.refresh_token:
+            token_response = self.session.post(
+                url='/oauth2/token',
+                data={
+                    'grant_type': 'refresh_token',
+                    'refresh_token': self.token_data.refresh_token,
+                    'client_id': 'client'
+                }
+            )
+            if token_response.ok:
+                token_json = token_response.json()
+                # Сервер может не вернуть новый refresh_token - продолжаем использовать старый
+                token_json.setdefault('refresh_token', self.token_data.refresh_token)
+                return self._store_token(token_json)
+
+        if not (self.username and self.password):
+            raise ValueError("Нет refresh_token и учетных данных для повторного получения токена")
+
+        self.code_verifier, self.code_challenge = pkce.generate_pkce_pair()
+        return self.get_token(self.username, self.password)
+
+    def _store_token(self, token_json: dict) -> str:
+        if not token_json.get('access_token'):
+            raise ValueError("Не удалось получить access_token из ответа сервера")
+        self.use_token(OAuthToken.model_validate(token_json))
+        return self.token
@@ -0,0 +1,173 @@
+import asyncio
+import os
+import random
+import threading
+import time
+from collections import Counter
+from typing import Awaitable, Callable, TypeVar
+
+import allure
+from exceptions import CircuitOpenError
+
+T = TypeVar("T")
+
+RETRYABLE_STATUSES = frozenset({429, 500, 502, 503, 504})
+IDEMPOTENT_METHODS = frozenset({"GET", "DELETE", "HEAD", "OPTIONS"})
+
+# Счетчики за процесс (воркер): retries, circuit_opened, short_circuited - выводятся в terminal summary
+stats: Counter = Counter()
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker на сервис (gateway, auth): после failure_threshold подряд неудачных запросов
+    (5xx / сетевая ошибка) запросы не отправляются reset_timeout секунд, затем пропускается пробный
+    """
+
+    _registry: dict[str, "CircuitBreaker"] = {}
+    _registry_lock = threading.Lock()
+
+    def __init__(self, service: str, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.service = service
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: float | None = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def for_service(cls, service: str, **kwargs) -> "CircuitBreaker":
+        """Один breaker на сервис в процессе - общий для всех клиентов"""
+        with cls._registry_lock:
+            if service not in cls._registry:
+                cls._registry[service] = cls(service, **kwargs)
+            return cls._registry[service]
+
+    def before_request(self) -> None:
+        with self._lock:
+            if self.opened_at is None:
+                return
+            retry_in = self.opened_at + self.reset_timeout - time.monotonic()
+            if retry_in > 0:
+                stats["short_circuited"] += 1
+                raise CircuitOpenError(self.service, retry_in)
+            # half-open: пропускаем пробный запрос, при неудаче breaker снова откроется
+            self.opened_at = None
+            self.failures = self.failure_threshold - 1
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.failures = 0
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            if self.failures >= self.failure_threshold and self.opened_at is None:
+                self.opened_at = time.monotonic()
+                stats["circuit_opened"] += 1
+                allure.attach(f"{self.service}: {self.failures} ошибок подряд", name="Circuit Opened")
+
+
+class Resilience:
+    """
+    Повторы с экспоненциальной задержкой и jitter + circuit breaker для HTTP клиентов
+
+    По умолчанию повторяются только идемпотентные методы (GET/DELETE/...);
+    retryable=True в call/acall разрешает повтор явно (например, bulk POST).
+    send возвращает ответ requests/httpx (нужен только status_code и headers).
+    """
+
+    def __init__(
+            self,
+            service: str,
+            max_retries: int = 3,
+            backoff_base: float = 0.5,
+            backoff_max: float = 10.0,
+            failure_threshold: int = 5,
+            reset_timeout: float = 30.0,
+            transport_errors: tuple[type[Exception], ...] = (ConnectionError, TimeoutError)
+    ):
+        self.service = service
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.transport_errors = transport_errors
+        self.breaker = CircuitBreaker.for_service(
+            service, failure_threshold=failure_threshold, reset_timeout=reset_timeout
+        )
+
+    @classmethod
+    def from_env(cls, service: str, transport_errors: tuple[type[Exception], ...]) -> "Resilience":
+        """Настройки из переменных окружения HTTP_RETRIES / HTTP_BACKOFF_* / CIRCUIT_*"""
+        return cls(
+            service,
+            max_retries=int(os.getenv("HTTP_RETRIES", "3")),
+            backoff_base=float(os.getenv("HTTP_BACKOFF_BASE", "0.5")),
+            backoff_max=float(os.getenv("HTTP_BACKOFF_MAX", "10")),
+            failure_threshold=int(os.getenv("CIRCUIT_FAILURE_THRESHOLD", "5")),
+            reset_timeout=float(os.getenv("CIRCUIT_RESET_TIMEOUT", "30")),
+            transport_errors=transport_errors,
+        )
+
+    def delay(self, attempt: int, retry_after: str | None = None) -> float:
+        """Retry-After от сервера или full jitter: random(0, min(max, base * 2^attempt))"""
+        if retry_after and retry_after.isdigit():
+            return min(float(retry_after), self.backoff_max)
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+    def _next_delay(self, method: str, retryable: bool | None, retries: int | None, attempt: int,
+                    response=None, error: Exception | None = None) -> float | None:
+        """Записать результат попытки в breaker и вернуть паузу перед повтором (None - не повторять)"""
+        failed = error is not None or response.status_code >= 500
+        if failed:
+            self.breaker.record_failure()
+        else:
+            self.breaker.record_success()
+
+        can_retry = method.upper() in IDEMPOTENT_METHODS if retryable is None else retryable
+        should_retry = error is not None or response.status_code in RETRYABLE_STATUSES
+        max_retries = self.max_retries if retries is None else retries
+        # Breaker только что открылся - отдаем исходную ошибку, а не CircuitOpenError на следующей попытке
+        if not (can_retry and should_retry) or attempt >= max_retries or self.breaker.opened_at is not None:
+            return None
+
+        stats["retries"] += 1
+        return self.delay(attempt, response.headers.get("Retry-After") if response is not None else None)
+
+    def call(self, method: str, send: Callable[[], T], retryable: bool | None = None, retries: int | None = None) -> T:
+        attempt = 0
+        while True:
+            self.breaker.before_request()
+            try:
+                response = send()
+                pause = self._next_delay(method, retryable, retries, attempt, response=response)
+                if pause is None:
+                    return response
+            except self.transport_errors as e:
+                pause = self._next_delay(method, retryable, retries, attempt, error=e)
+                if pause is None:
+                    raise
+            attempt += 1
+            time.sleep(pause)
+
+    async def acall(
+            self,
+            method: str,
+            send: Callable[[], Awaitable[T]],
+            retryable: bool | None = None,
+            retries: int | None = None
+    ) -> T:
+        attempt = 0
+        while True:
+            self.breaker.before_request()
+            try:
+                response = await send()
+                pause = self._next_delay(method, retryable, retries, attempt, response=response)
+                if pause is None:
+                    return response
+            except self.transport_errors as e:
+                pause = self._next_delay(method, retryable, retries, attempt, error=e)
+                if pause is None:
+                    raise
+            attempt += 1
+            await asyncio.sleep(pause)
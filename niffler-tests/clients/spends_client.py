@@ -1,12 +1,46 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable, Iterator
+
 import allure
 import requests
-from models.data_models import Category, Spend, SpendAdd
+from clients.async_spends_client import AsyncSpendsHttpClient
+from clients.cassette import Cassette, CassetteAdapter
+from clients.http_capture import HttpCapture
+from clients.oauth_client import OAuthClient
+from clients.resilience import Resilience
+from clients.token_cache import TokenCache
+from models.data_models import BulkItemResult, Category, Spend, SpendAdd, SpendBase, SpendPage
 
 
 class SpendsHttpClient:
-    def __init__(self, base_url: str, token: str):
+    def __init__(
+            self,
+            base_url: str,
+            token: str,
+            capture: HttpCapture | None = None,
+            oauth_client: OAuthClient | None = None,
+            resilience: Resilience | None = None,
+            cassette: Cassette | None = None,
+            token_cache: TokenCache | None = None
+    ):
         self.base_url = base_url
+        self.token = token
+        self.capture = capture or HttpCapture.from_env()
+        # Если передан, на 401 токен обновляется и запрос повторяется один раз
+        self.oauth_client = oauth_client
+        # Куда записать обновленный токен, чтобы его получили следующие клиенты/воркеры
+        self.token_cache = token_cache
+        # Повторы GET/DELETE на 5xx/429 и circuit breaker, общий с async клиентом этого gateway
+        self.resilience = resilience or Resilience.from_env(
+            base_url, (requests.exceptions.ConnectionError, requests.exceptions.Timeout)
+        )
+        self.cassette = cassette
         self.session = requests.session()
+        if cassette:
+            # Запись обменов на диск или их воспроизведение без сети
+            self.session.mount('http://', CassetteAdapter(cassette))
+            self.session.mount('https://', CassetteAdapter(cassette))
         self.session.headers.update({
             'Accept': 'application/json',
             'Authorization': f'Bearer {token}',
@@ -14,23 +48,42 @@ class SpendsHttpClient:
         })
 
     def _make_request(self, method: str, endpoint: str, **kwargs):
-        """Базовый метод для HTTP запросов с attachments"""
+        """Базовый метод для HTTP запросов с attachments по политике self.capture"""
         url = f"{self.base_url}{endpoint}"
 
         with allure.step(f"{method.upper()} {endpoint}"):
-            allure.attach(url, name="URL", attachment_type=allure.attachment_type.TEXT)
-
-            if 'json' in kwargs:
-                allure.attach(str(kwargs['json']), name="Request Body", attachment_type=allure.attachment_type.JSON)
-
-            response = self.session.request(method, url, **kwargs)
+            try:
+                response = self.resilience.call(method, lambda: self._send(method, url, **kwargs))
+            except requests.exceptions.RequestException as e:
+                self.capture.record(method, url, kwargs.get('json'), None, str(e).encode())
+                raise
 
-            allure.attach(str(response.status_code), name="Status", attachment_type=allure.attachment_type.TEXT)
-            allure.attach(response.text, name="Response", attachment_type=allure.attachment_type.JSON)
+            self.capture.record(method, url, kwargs.get('json'), response.status_code, response.content)
 
             response.raise_for_status()
             return response
 
+    def _send(self, method: str, url: str, **kwargs) -> requests.Response:
+        """Одна попытка запроса с повтором после обновления токена на 401"""
+        response = self.session.request(method, url, **kwargs)
+        if response.status_code == 401 and self.oauth_client:
+            self._renew_token()
+            response = self.session.request(method, url, **kwargs)
+        return response
+
+    def _renew_token(self) -> None:
+        """
+        Обновление токена после 401. Если OAuthClient уже держит более новый токен (его обновил другой клиент),
+        берем его: refresh публичного клиента niffler - это полный PKCE логин
+        """
+        if self.oauth_client.token and self.oauth_client.token != self.token:
+            self.token = self.oauth_client.token
+        else:
+            self.token = self.oauth_client.refresh()
+            if self.token_cache:
+                self.token_cache.put(self.oauth_client.auth_url, self.oauth_client.username, self.oauth_client.token_data)
+        self.session.headers['Authorization'] = f'Bearer {self.token}'
+
     @allure.step("Получение всех категорий")
     def get_categories(self) -> list[Category]:
         response = self._make_request("GET", "/api/categories/all")
@@ -43,7 +96,7 @@ class SpendsHttpClient:
 
     @allure.step("Добавление категории: {name}")
     def add_category(self, name: str) -> Category:
-        response = self._make_request("POST", "/api/categories/add", json={"category": name})
+        response = self._make_request("POST", "/api/categories/add", json={"name": name})
         return Category.model_validate(response.json())
 
     @allure.step("Получение всех трат")
@@ -51,6 +104,35 @@ class SpendsHttpClient:
         response = self._make_request("GET", "/api/spends/all")
         return [Spend.model_validate(item) for item in response.json()]
 
+    def iter_spends(
+            self,
+            page_size: int = 100,
+            filter_period: str | None = None,
+            filter_currency: str | None = None,
+            search_query: str | None = None,
+            sort: str = "id"
+    ) -> Iterator[SpendBase]:
+        """
+        Ленивый обход трат по страницам /api/v2/spends/all.
+        Каждая страница валидируется одним вызовом model_validate_json по сырым байтам ответа,
+        следующая страница запрашивается только когда генератор до нее дошел - можно остановиться раньше
+        """
+        params = {
+            "size": page_size,
+            "sort": sort,
+            "filterPeriod": filter_period,
+            "filterCurrency": filter_currency,
+            "searchQuery": search_query,
+        }
+        page_number = 0
+        while True:
+            response = self._make_request("GET", "/api/v2/spends/all", params={**params, "page": page_number})
+            page = SpendPage.model_validate_json(response.content)
+            yield from page.content
+            if page.last or not page.content:
+                return
+            page_number += 1
+
     @allure.step("Удаление трат: {ids}")
     def remove_spends(self, ids: list[str]):
         self._make_request("DELETE", "/api/spends/remove", params={"ids": ids})
@@ -68,3 +150,32 @@ class SpendsHttpClient:
     def remove_spend(self, spend_id: str):
         """Удалить одну трату по ID"""
         self.remove_spends([spend_id])
+
+    def _run_bulk(self, operation: str, items: list, concurrency: int, retries: int) -> list[BulkItemResult]:
+        """
+        Запуск bulk операции async клиента из синхронного кода.
+        Event loop поднимается в отдельном потоке - в основном потоке может уже крутиться loop Playwright
+        """
+        async def run() -> list[BulkItemResult]:
+            async with AsyncSpendsHttpClient(
+                    self.base_url, self.token, max_connections=concurrency, capture=self.capture,
+                    oauth_client=self.oauth_client, cassette=self.cassette, token_cache=self.token_cache
+            ) as client:
+                results = await getattr(client, operation)(items, concurrency=concurrency, retries=retries)
+                if client.token != self.token:
+                    self.token = client.token
+                    self.session.headers['Authorization'] = f'Bearer {self.token}'
+                return results
+
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            return executor.submit(asyncio.run, run()).result()
+
+    @allure.step("Bulk добавление трат (concurrency={concurrency})")
+    def add_spends_bulk(self, spends: Iterable[SpendAdd], concurrency: int = 10, retries: int = 3) -> list[BulkItemResult]:
+        """Параллельное добавление трат с ограничением concurrency, ошибки возвращаются по каждому элементу"""
+        return self._run_bulk("add_spends_bulk", list(spends), concurrency, retries)
+
+    @allure.step("Bulk добавление категорий (concurrency={concurrency})")
+    def add_categories_bulk(self, names: Iterable[str], concurrency: int = 10, retries: int = 3) -> list[BulkItemResult]:
+        """Параллельное добавление категорий с ограничением concurrency"""
+        return self._run_bulk("add_categories_bulk", list(names), concurrency, retries)
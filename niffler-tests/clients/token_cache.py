@@ -0,0 +1,85 @@
+import base64
+import json
+import time
+from pathlib import Path
+from typing import Callable
+
+import allure
+from clients.oauth_client import OAuthToken
+from utils.file_lock import FileLock, atomic_write_text
+
+
+class TokenCache:
+    """
+    Файловый кэш OAuth токенов, общий для всех xdist воркеров и между запусками
+
+    Ключ - (auth_url, username), значение - OAuthToken целиком (вместе с refresh_token).
+    Срок жизни берется из claim `exp` самого JWT, токен обновляется только если
+    до истечения осталось меньше min_ttl секунд.
+    """
+
+    def __init__(self, path: Path = Path(".pytest_cache") / "oauth_tokens.json", min_ttl: int = 300):
+        self.path = Path(path)
+        self.lock_path = self.path.with_suffix(".lock")
+        self.min_ttl = min_ttl
+
+    @staticmethod
+    def jwt_exp(token: str) -> int | None:
+        """Claim exp из payload JWT (без проверки подписи - нужен только срок жизни)"""
+        try:
+            payload = token.split(".")[1]
+            payload += "=" * (-len(payload) % 4)
+            return int(json.loads(base64.urlsafe_b64decode(payload))["exp"])
+        except Exception:
+            return None
+
+    def is_valid(self, token: OAuthToken | None) -> bool:
+        """Токен есть и не истекает в ближайшие min_ttl секунд (id_token тоже - с ним ходит фронтенд)"""
+        if token is None:
+            return False
+        expirations = [self.jwt_exp(t) for t in (token.access_token, token.id_token) if t]
+        return None not in expirations and min(expirations) - time.time() > self.min_ttl
+
+    def _read(self) -> dict[str, OAuthToken]:
+        try:
+            raw = json.loads(self.path.read_text(encoding="utf-8"))
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+        return {key: OAuthToken.model_validate(value) for key, value in raw.items() if isinstance(value, dict)}
+
+    def _write(self, tokens: dict[str, OAuthToken]) -> None:
+        atomic_write_text(self.path, json.dumps({key: t.model_dump() for key, t in tokens.items()}, indent=2))
+
+    def get(self, auth_url: str, username: str) -> OAuthToken | None:
+        """Валидный токен из кэша или None"""
+        with FileLock(self.lock_path):
+            token = self._read().get(f"{auth_url}|{username}")
+        return token if self.is_valid(token) else None
+
+    def put(self, auth_url: str, username: str, token: OAuthToken) -> None:
+        with FileLock(self.lock_path):
+            tokens = self._read()
+            tokens[f"{auth_url}|{username}"] = token
+            self._write(tokens)
+
+    def get_or_fetch(
+            self,
+            auth_url: str,
+            username: str,
+            fetch: Callable[[OAuthToken | None], OAuthToken]
+    ) -> OAuthToken:
+        """
+        Токен из кэша, а если его нет или он истекает - fetch(устаревший_токен) под блокировкой.
+        Пока один воркер логинится, остальные ждут на lock и затем получают его токен
+        """
+        key = f"{auth_url}|{username}"
+        with FileLock(self.lock_path):
+            tokens = self._read()
+            token = tokens.get(key)
+            if self.is_valid(token):
+                allure.attach(f"Токен для {username} взят из кэша {self.path}", name="Token Cache")
+                return token
+
+            tokens[key] = fetch(token)
+            self._write(tokens)
+            return tokens[key]
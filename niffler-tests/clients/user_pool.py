@@ -0,0 +1,132 @@
+import json
+import os
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import allure
+from pydantic import BaseModel
+from clients.auth_session import AuthSession
+from clients.auth_state import storage_state_from_token
+from clients.oauth_client import OAuthClient, OAuthToken
+from clients.token_cache import TokenCache
+from utils.file_lock import FileLock, atomic_write_text
+
+
+class PooledUser(BaseModel):
+    """Пользователь из пула и его текущая аренда"""
+    username: str
+    password: str
+    leased_by: str | None = None
+
+
+class UserPool:
+    """
+    Пул заранее зарегистрированных пользователей, общий для xdist воркеров
+
+    Пользователи регистрируются по HTTP (AuthSession.register), их токены лежат в TokenCache,
+    storage state для браузера собирается из id_token/access_token без UI логина.
+    Каждый воркер (или тест) арендует пользователя эксклюзивно: lease(owner) / release(owner).
+    Аренды чужого запуска (другой PYTEST_XDIST_TESTRUNUID) считаются протухшими.
+    """
+
+    def __init__(
+            self,
+            environment: dict,
+            path: Path = Path(".pytest_cache") / "user_pool.json",
+            password: str = "TestPass123",
+            run_id: str | None = None
+    ):
+        self.environment = environment
+        self.path = Path(path)
+        self.lock_path = self.path.with_suffix(".lock")
+        self.states_dir = self.path.parent / "user_pool"
+        self.password = password
+        self.run_id = run_id or os.getenv("PYTEST_XDIST_TESTRUNUID") or uuid.uuid4().hex
+        self.token_cache = TokenCache()
+
+    def _read(self) -> list[PooledUser]:
+        try:
+            raw = json.loads(self.path.read_text(encoding="utf-8"))
+        except (FileNotFoundError, json.JSONDecodeError):
+            return []
+        users = [PooledUser.model_validate(item) for item in raw]
+        for user in users:
+            if user.leased_by and not user.leased_by.startswith(f"{self.run_id}:"):
+                user.leased_by = None
+        return users
+
+    def _write(self, users: list[PooledUser]) -> None:
+        atomic_write_text(self.path, json.dumps([user.model_dump() for user in users], indent=2))
+
+    def _create_user(self) -> PooledUser:
+        """Регистрация нового пользователя по HTTP и получение его токена"""
+        user = PooledUser(username=f"pool_{uuid.uuid4().hex[:12]}", password=self.password)
+        if not AuthSession(self.environment["auth_url"]).register(user.username, user.password):
+            raise ValueError(f"Не удалось зарегистрировать пользователя пула {user.username}")
+        # Логин вне блокировки TokenCache, чтобы параллельная регистрация не ждала чужие логины
+        oauth_client = OAuthClient(config=self.environment)
+        oauth_client.get_token(user.username, user.password)
+        self.token_cache.put(self.environment["auth_url"], user.username, oauth_client.token_data)
+        self._write_state(user, oauth_client.token_data)
+        return user
+
+    @allure.step("Пул пользователей: подготовка {size} пользователей")
+    def provision(self, size: int, parallel: int = 8) -> list[PooledUser]:
+        """Дорегистрировать пользователей до размера size (первый воркер создает, остальные ждут на lock)"""
+        with FileLock(self.lock_path):
+            users = self._read()
+            missing = size - len(users)
+            if missing > 0:
+                with ThreadPoolExecutor(max_workers=min(parallel, missing)) as executor:
+                    users += list(executor.map(lambda _: self._create_user(), range(missing)))
+                self._write(users)
+            return users
+
+    @allure.step("Пул пользователей: аренда для '{owner}'")
+    def lease(self, owner: str) -> PooledUser:
+        """Эксклюзивная аренда пользователя; если свободных нет - пул расширяется на одного"""
+        lease_id = f"{self.run_id}:{owner}"
+        with FileLock(self.lock_path):
+            users = self._read()
+            user = next((u for u in users if u.leased_by == lease_id), None) \
+                or next((u for u in users if u.leased_by is None), None)
+            if user is None:
+                user = self._create_user()
+                users.append(user)
+            user.leased_by = lease_id
+            self._write(users)
+        allure.attach(f"Username: {user.username}", name="Pooled User")
+        return user
+
+    def release(self, owner: str) -> None:
+        """Вернуть пользователя в пул"""
+        lease_id = f"{self.run_id}:{owner}"
+        with FileLock(self.lock_path):
+            users = self._read()
+            for user in users:
+                if user.leased_by == lease_id:
+                    user.leased_by = None
+            self._write(users)
+
+    def token(self, user: PooledUser) -> OAuthToken:
+        """Токен пользователя из TokenCache (логин по HTTP только если он истекает)"""
+        def fetch(expired: OAuthToken | None) -> OAuthToken:
+            oauth_client = OAuthClient(config=self.environment, username=user.username, password=user.password)
+            if expired:
+                oauth_client.use_token(expired)
+                oauth_client.refresh()
+            else:
+                oauth_client.get_token(user.username, user.password)
+            return oauth_client.token_data
+
+        return self.token_cache.get_or_fetch(self.environment["auth_url"], user.username, fetch)
+
+    def storage_state(self, user: PooledUser) -> Path:
+        """Playwright storage state из токена пользователя (см. storage_state_from_token)"""
+        return self._write_state(user, self.token(user))
+
+    def _write_state(self, user: PooledUser, token: OAuthToken) -> Path:
+        state_file = self.states_dir / f"{user.username}.json"
+        atomic_write_text(state_file, json.dumps(storage_state_from_token(self.environment, token), indent=2))
+        return state_file
@@ -29,6 +29,13 @@ class Config:
             "client_id": "niffler-client",
             "client_secret": os.getenv("CLIENT_SECRET", "secret")
         },
+        "mock": {
+            # Без docker: БД niffler-spend заменяется SQLite (в памяти или в файле MOCK_SPEND_DB_PATH)
+            "auth_url": "http://localhost:9000",
+            "frontend_url": "http://localhost:3000",
+            "gateway_url": "http://localhost:8090",
+            "spend_db_url": f"sqlite:///{os.getenv('MOCK_SPEND_DB_PATH', ':memory:')}",
+        },
         "staging": {
             "auth_url": f"https://{os.getenv('STAGING_AUTH_HOST', 'auth.niffler-stage.qa.guru')}",
             "frontend_url": f"https://{os.getenv('STAGING_FRONTEND_HOST', 'niffler-stage.qa.guru')}",
@@ -48,7 +55,7 @@ class Config:
         Получение конфигурации для окружения с приоритетом .env переменных
 
         Args:
-            env_name: имя окружения (local, docker, staging)
+            env_name: имя окружения (local, docker, staging, mock)
 
         Returns:
             dict: конфигурация с auth_url, frontend_url, gateway_url, spend_db_url
@@ -72,7 +79,9 @@ class Config:
             "auth_url": auth_url_from_env or default_config.get("auth_url"),
             "frontend_url": frontend_url_from_env or default_config.get("frontend_url"),
             "gateway_url": gateway_url_from_env or default_config.get("gateway_url"),
-            "spend_db_url": spend_db_url_from_env or default_config.get("spend_db_url"),
+            # mock всегда использует SQLite, даже если в .env указан Postgres
+            "spend_db_url": (spend_db_url_from_env if env_name != "mock" else None)
+                            or default_config.get("spend_db_url"),
             "token_url": token_url_from_env or default_config.get("token_url"),
             "client_id": client_id_from_env or default_config.get("client_id"),
             "client_secret": client_secret_from_env or default_config.get("client_secret"),
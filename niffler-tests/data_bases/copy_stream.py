@@ -0,0 +1,35 @@
+import io
+from typing import Iterable, NamedTuple
+
+
+class CopyStream(io.RawIOBase):
+    """Файлоподобный поток строк в текстовом формате COPY - строки генерируются по мере чтения"""
+
+    def __init__(self, rows: Iterable[NamedTuple]):
+        self._lines = (self._format(row) for row in rows)
+        self._buffer = b""
+        self.count = 0
+
+    @staticmethod
+    def _format(row: NamedTuple) -> bytes:
+        values = (
+            "\\N" if value is None
+            else str(value).replace("\\", "\\\\").replace("\t", "\\t").replace("\n", "\\n").replace("\r", "\\r")
+            for value in row
+        )
+        return ("\t".join(values) + "\n").encode()
+
+    def readable(self) -> bool:
+        return True
+
+    def read(self, size: int = -1) -> bytes:
+        while size < 0 or len(self._buffer) < size:
+            line = next(self._lines, None)
+            if line is None:
+                break
+            self._buffer += line
+            self.count += 1
+        if size < 0:
+            size = len(self._buffer)
+        chunk, self._buffer = self._buffer[:size], self._buffer[size:]
+        return chunk
@@ -0,0 +1,71 @@
+import heapq
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Iterator
+
+from sqlalchemy import Engine, event
+
+# Управление транзакциями не считается: в Postgres BEGIN неявный, в SQLite замене - явный запрос
+_TRANSACTION_CONTROL = ("BEGIN", "SAVEPOINT", "RELEASE SAVEPOINT", "ROLLBACK TO SAVEPOINT")
+
+
+@dataclass
+class QueryStats:
+    """Количество и время SQL запросов за интервал (тест), плюс самые медленные запросы"""
+    count: int = 0
+    total_ms: float = 0.0
+    slowest: list[tuple[float, str]] = field(default_factory=list)  # min-heap (ms, statement)
+    top: int = 5
+
+    def add(self, elapsed_ms: float, statement: str) -> None:
+        self.count += 1
+        self.total_ms += elapsed_ms
+        if len(self.slowest) < self.top:
+            heapq.heappush(self.slowest, (elapsed_ms, statement))
+        else:
+            heapq.heappushpop(self.slowest, (elapsed_ms, statement))
+
+    def summary(self) -> str:
+        lines = [f"Запросов: {self.count}, время: {self.total_ms:.1f} ms"]
+        for elapsed_ms, statement in sorted(self.slowest, reverse=True):
+            lines.append(f"{elapsed_ms:8.1f} ms  {' '.join(statement.split())[:300]}")
+        return "\n".join(lines)
+
+
+class QueryRecorder:
+    """
+    Счетчик запросов engine на событиях before/after_cursor_execute.
+    Запрос попадает во все открытые measure() - включая запросы из других потоков (wait_for, bulk)
+    """
+
+    def __init__(self, engine: Engine):
+        self._active: list[QueryStats] = []
+        self._lock = threading.Lock()
+        event.listen(engine, "before_cursor_execute", self._before)
+        event.listen(engine, "after_cursor_execute", self._after)
+
+    @staticmethod
+    def _before(conn, cursor, statement, parameters, context, executemany) -> None:
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+    def _after(self, conn, cursor, statement, parameters, context, executemany) -> None:
+        elapsed_ms = (time.perf_counter() - conn.info["query_start"].pop()) * 1000
+        if statement.lstrip().upper().startswith(_TRANSACTION_CONTROL):
+            return
+        with self._lock:
+            for stats in self._active:
+                stats.add(elapsed_ms, statement)
+
+    @contextmanager
+    def measure(self) -> Iterator[QueryStats]:
+        """Собирать статистику запросов внутри блока"""
+        stats = QueryStats()
+        with self._lock:
+            self._active.append(stats)
+        try:
+            yield stats
+        finally:
+            with self._lock:
+                self._active.remove(stats)
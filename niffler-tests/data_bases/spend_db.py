@@ -1,23 +1,177 @@
-from typing import Sequence
+import copy
+import functools
+import itertools
+import os
+import select as io_select
+import tempfile
+import time
+from contextlib import contextmanager, nullcontext, suppress
+from typing import Any, Callable, ContextManager, Iterable, Iterator, NamedTuple, Sequence
 
 import allure
-from sqlalchemy import create_engine, Engine
+from sqlalchemy import (
+    cast, Column, Connection, create_engine, delete, Delete, Engine, Executable, exists, func, insert, make_url, Row,
+    String
+)
 from sqlmodel import Session, select
-from models.data_models import Category, Spend
-from exceptions import DatabaseError
+from data_bases.copy_stream import CopyStream
+from data_bases.query_stats import QueryRecorder
+from data_bases.sqlite_schema import configure_sqlite
+from models.data_models import Category, CategoryRow, Spend, SpendDiff, SpendRow, SpendSnapshot
+from exceptions import DatabaseError, ValidationError
+
+# Колонки для read-only проекций в порядке полей SpendRow/CategoryRow
+SPEND_ROW_COLUMNS = tuple(Spend.__table__.c[name] for name in SpendRow._fields)
+CATEGORY_ROW_COLUMNS = tuple(Category.__table__.c[name] for name in CategoryRow._fields)
+
+# md5 от всех колонок траты через разделитель - считается в БД, в Python приходит только 32 символа на строку
+SPEND_ROW_HASH = func.md5(functools.reduce(
+    lambda left, right: left + "|" + right, (cast(column, String) for column in SPEND_ROW_COLUMNS[1:])
+))
+
+NOTIFY_CHANNEL = "niffler_spend_inserted"
+
+# Тестовая миграция: уведомление о каждой вставке в spend (payload - username).
+# Триггер создается только если его нет (CREATE TRIGGER берет блокировку spend, пишущую сессии ждали бы),
+# advisory xact lock - чтобы xdist воркеры не создавали/удаляли его одновременно
+NOTIFY_TRIGGER_DDL = f"""
+SELECT pg_advisory_xact_lock(hashtext('{NOTIFY_CHANNEL}'));
+DO $install$
+BEGIN
+    IF NOT EXISTS (SELECT 1 FROM pg_trigger WHERE tgname = 'niffler_test_spend_notify') THEN
+        CREATE OR REPLACE FUNCTION niffler_test_notify_spend() RETURNS trigger AS $notify$
+        BEGIN
+            PERFORM pg_notify('{NOTIFY_CHANNEL}', NEW.username);
+            RETURN NEW;
+        END;
+        $notify$ LANGUAGE plpgsql;
+        CREATE TRIGGER niffler_test_spend_notify AFTER INSERT ON spend
+            FOR EACH ROW EXECUTE FUNCTION niffler_test_notify_spend();
+    END IF;
+END
+$install$;
+"""
+
+NOTIFY_TRIGGER_DROP_DDL = f"""
+SELECT pg_advisory_xact_lock(hashtext('{NOTIFY_CHANNEL}'));
+DROP TRIGGER IF EXISTS niffler_test_spend_notify ON spend;
+DROP FUNCTION IF EXISTS niffler_test_notify_spend();
+"""
+
+# Счетчик сессий, которым нужен триггер: каждая держит shared advisory lock на своем соединении,
+# удаляет триггер только та, что смогла взять этот lock эксклюзивно (то есть последняя)
+NOTIFY_USERS_LOCK = f"hashtext('{NOTIFY_CHANNEL}:users')"
 
 
 class SpendDb:
-    def __init__(self, db_url: str):
+    """
+    Доступ к БД niffler-spend
+
+    Engine держит пул соединений и создается один раз на процесс (xdist воркер):
+    session-фикстура spend_db вызывает dispose() в конце сессии, чтобы соединения не утекали.
+    sqlite:// URL (--env=mock) - замена Postgres: схема niffler-spend создается в файле (MOCK_SPEND_DB_PATH),
+    для in-memory URL - во временном файле: у каждого соединения пула своя транзакция, как в Postgres.
+    Пока isolated() держит пишущую транзакцию, запись через другие соединения ждет ее отката (busy timeout SQLite).
+    """
+
+    def __init__(
+            self,
+            db_url: str,
+            pool_size: int = 5,
+            max_overflow: int = 5,
+            pool_timeout: float = 30.0,
+            pool_recycle: int = 1800,
+            statement_timeout_ms: int = 30000
+    ):
+        # Файл БД, созданный вместо sqlite in-memory - удаляется в dispose()
+        self._temp_file: str | None = None
         try:
-            self.engine: Engine = create_engine(db_url)
+            url = make_url(db_url)
+            engine_kwargs = {}
+            if url.get_backend_name() == "postgresql":
+                engine_kwargs = {
+                    "pool_size": pool_size,
+                    "max_overflow": max_overflow,
+                    "pool_timeout": pool_timeout,
+                    "pool_recycle": pool_recycle,
+                    # Зависший запрос обрывается сервером, а не блокирует тест до таймаута CI
+                    "connect_args": {"options": f"-c statement_timeout={statement_timeout_ms}"},
+                }
+            elif url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:"):
+                # In-memory БД видна только своему соединению: общий пул на одном соединении ломает
+                # параллельные транзакции (isolated() и spend_db), поэтому БД процесса - временный файл
+                fd, self._temp_file = tempfile.mkstemp(prefix="niffler_spend_", suffix=".db")
+                os.close(fd)
+                url = url.set(database=self._temp_file)
+            # pool_pre_ping отбрасывает соединения, закрытые сервером между тестами
+            self.engine: Engine = create_engine(url, pool_pre_ping=True, **engine_kwargs)
+            if url.get_backend_name() == "sqlite":
+                configure_sqlite(self.engine)
         except Exception as e:
             raise DatabaseError(f"Не удалось подключиться к БД: {str(e)}", operation="connect")
+        # Куда привязываются сессии: engine или соединение с открытой транзакцией (isolated)
+        self.bind: Engine | Connection = self.engine
+        # Канал LISTEN для wait_for - задается install_notify_trigger(), иначе только опрос
+        self.notify_channel: str | None = None
+        # Соединение с shared advisory lock, пока эта сессия использует триггер NOTIFY
+        self._notify_guard: Connection | None = None
+        # Количество/время запросов: queries.measure() - на тест в фикстуре db_query_stats
+        self.queries = QueryRecorder(self.engine)
+
+    @classmethod
+    def from_env(cls, db_url: str) -> "SpendDb":
+        """Настройки пула из переменных окружения DB_POOL_* / DB_STATEMENT_TIMEOUT_MS"""
+        return cls(
+            db_url,
+            pool_size=int(os.getenv("DB_POOL_SIZE", "5")),
+            max_overflow=int(os.getenv("DB_MAX_OVERFLOW", "5")),
+            pool_timeout=float(os.getenv("DB_POOL_TIMEOUT", "30")),
+            pool_recycle=int(os.getenv("DB_POOL_RECYCLE", "1800")),
+            statement_timeout_ms=int(os.getenv("DB_STATEMENT_TIMEOUT_MS", "30000")),
+        )
+
+    def dispose(self) -> None:
+        """Закрыть все соединения пула (и удалить триггер NOTIFY, если эта сессия последняя его использовала)"""
+        self.uninstall_notify_trigger()
+        self.engine.dispose()
+        if self._temp_file:
+            for suffix in ("", "-wal", "-shm"):
+                with suppress(FileNotFoundError):
+                    os.remove(self._temp_file + suffix)
+            self._temp_file = None
+
+    def __enter__(self) -> "SpendDb":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.dispose()
+
+    def session(self) -> Session:
+        """
+        Сессия на self.bind. Внутри isolated() commit() сессии фиксирует только SAVEPOINT,
+        внешняя транзакция соединения остается открытой
+        """
+        return Session(self.bind, join_transaction_mode="create_savepoint")
+
+    @contextmanager
+    def isolated(self) -> Iterator["SpendDb"]:
+        """
+        Копия SpendDb на одном соединении с внешней транзакцией, которая откатывается на выходе.
+        Все записи теста (включая commit в методах SpendDb) видны только ему и не требуют очистки
+        """
+        with self.engine.connect() as connection:
+            transaction = connection.begin()
+            db = copy.copy(self)
+            db.bind = connection
+            try:
+                yield db
+            finally:
+                transaction.rollback()
 
     @allure.step("БД: Получение категорий пользователя '{username}'")
     def get_user_categories(self, username: str) -> Sequence[Category]:
         try:
-            with Session(self.engine) as session:
+            with self.session() as session:
                 statement = select(Category).where(Category.username == username)
                 return session.exec(statement).all()  # type: ignore
         except Exception as e:
@@ -31,7 +185,7 @@ class SpendDb:
     def get_user_spends(self, username: str) -> Sequence[Spend]:
         """Получить все траты пользователя"""
         try:
-            with Session(self.engine) as session:
+            with self.session() as session:
                 statement = select(Spend).where(Spend.username == username)
                 return session.exec(statement).all()  # type: ignore
         except Exception as e:
@@ -44,7 +198,7 @@ class SpendDb:
     @allure.step("БД: Удаление категории с ID '{category_id}'")
     def delete_category(self, category_id: str, username: str = None):
         try:
-            with Session(self.engine) as session:
+            with self.session() as session:
                 category = session.get(Category, category_id)
                 if category:
                     session.delete(category)
@@ -68,7 +222,7 @@ class SpendDb:
     def delete_spend(self, spend_id: str, username: str = None):
         """Удалить трату по ID"""
         try:
-            with Session(self.engine) as session:
+            with self.session() as session:
                 spend = session.get(Spend, spend_id)
                 if spend:
                     session.delete(spend)
@@ -92,10 +246,381 @@ class SpendDb:
     def get_spend_by_id(self, spend_id: str) -> Spend | None:
         """Получить трату по ID"""
         try:
-            with Session(self.engine) as session:
+            with self.session() as session:
                 return session.get(Spend, spend_id)
         except Exception as e:
             raise DatabaseError(
                 f"Ошибка получения траты по ID {spend_id}: {str(e)}",
                 operation="get_spend_by_id"
             )
+
+    def _delete_in_transaction(
+            self,
+            statements: dict[str, Delete],
+            operation: str,
+            username: str = None
+    ) -> dict[str, int]:
+        """Выполнить DELETE по порядку в одной транзакции и вернуть число удаленных строк по каждому"""
+        try:
+            with self.session() as session, session.begin():
+                counts = {name: session.execute(statement).rowcount for name, statement in statements.items()}
+        except Exception as e:
+            raise DatabaseError(f"Ошибка удаления: {str(e)}", username=username, operation=operation)
+        allure.attach(str(counts), name="Deleted Rows", attachment_type=allure.attachment_type.TEXT)
+        return counts
+
+    def delete_spends(self, ids: Sequence[str], username: str = None) -> int:
+        """Удалить траты по списку ID одним DELETE, вернуть число удаленных"""
+        if not ids:
+            return 0
+        with allure.step(f"БД: Удаление трат ({len(ids)} шт.)"):
+            statement = delete(Spend).where(Spend.id.in_(list(ids)))
+            return self._delete_in_transaction({"spends": statement}, "delete_spends", username)["spends"]
+
+    def delete_categories(self, ids: Sequence[str], username: str = None) -> dict[str, int]:
+        """
+        Удалить категории по списку ID одним DELETE, вернуть число удаленных трат и категорий.
+        Траты этих категорий удаляются в той же транзакции раньше - иначе сработает FK spend.category_id
+        """
+        if not ids:
+            return {"spends": 0, "categories": 0}
+        with allure.step(f"БД: Удаление категорий и их трат ({len(ids)} шт.)"):
+            return self._delete_in_transaction({
+                "spends": delete(Spend).where(Spend.category_id.in_(list(ids))),
+                "categories": delete(Category).where(Category.id.in_(list(ids))),
+            }, "delete_categories", username)
+
+    @allure.step("БД: Удаление всех трат и категорий пользователя '{username}'")
+    def purge_user(self, username: str) -> dict[str, int]:
+        """Удалить все данные пользователя в niffler-spend: сначала траты, затем категории"""
+        return self._delete_in_transaction({
+            "spends": delete(Spend).where(Spend.username == username),
+            "categories": delete(Category).where(Category.username == username),
+        }, "purge_user", username)
+
+    # Read-only выборки: Core select нужных колонок без ORM гидрации и identity map
+
+    def _connection(self) -> ContextManager[Connection]:
+        """Соединение для Core запросов: новое из пула или соединение isolated() транзакции"""
+        return self.bind.connect() if isinstance(self.bind, Engine) else nullcontext(self.bind)
+
+    def _rows(self, statement, operation: str, username: str = None) -> list[Row]:
+        try:
+            with self._connection() as connection:
+                return list(connection.execute(statement))
+        except Exception as e:
+            raise DatabaseError(f"Ошибка выборки: {str(e)}", username=username, operation=operation)
+
+    @allure.step("БД: Строки трат пользователя '{username}'")
+    def spend_rows(self, username: str) -> list[SpendRow]:
+        """Траты пользователя как кортежи SpendRow"""
+        statement = select(*SPEND_ROW_COLUMNS).where(Spend.username == username)
+        return [SpendRow._make(row) for row in self._rows(statement, "spend_rows", username)]
+
+    @allure.step("БД: Строки категорий пользователя '{username}'")
+    def category_rows(self, username: str) -> list[CategoryRow]:
+        """Категории пользователя как кортежи CategoryRow"""
+        statement = select(*CATEGORY_ROW_COLUMNS).where(Category.username == username)
+        return [CategoryRow._make(row) for row in self._rows(statement, "category_rows", username)]
+
+    def spend_columns(self, username: str, *columns: Column) -> list[Row]:
+        """Только указанные колонки трат: spend_columns(username, Spend.amount, Spend.currency)"""
+        with allure.step(f"БД: Колонки трат пользователя '{username}': {', '.join(c.key for c in columns)}"):
+            return self._rows(select(*columns).where(Spend.username == username), "spend_columns", username)
+
+    def iter_spend_rows(self, username: str, chunk_size: int = 1000) -> Iterator[SpendRow]:
+        """
+        Потоковый обход трат пользователя: yield_per читает строки пачками по chunk_size
+        через серверный курсор, в памяти не больше одной пачки.
+        Шаг Allure покрывает только выполнение запроса - между yield он не держится открытым,
+        иначе шаги вызывающего кода вложились бы в него
+        """
+        statement = (
+            select(*SPEND_ROW_COLUMNS)
+            .where(Spend.username == username)
+            .execution_options(yield_per=chunk_size)
+        )
+        try:
+            with self._connection() as connection:
+                with allure.step(f"БД: Потоковое чтение трат пользователя '{username}' (по {chunk_size})"):
+                    result = connection.execute(statement)
+                for row in result:
+                    yield SpendRow._make(row)
+        except Exception as e:
+            raise DatabaseError(f"Ошибка выборки: {str(e)}", username=username, operation="iter_spend_rows")
+
+    # Агрегаты считаются в Postgres - в Python возвращаются только скаляры, без загрузки ORM строк
+
+    @staticmethod
+    def _spend_filters(username: str | None, filters: dict) -> list:
+        """Условия WHERE по колонкам Spend: field=value"""
+        conditions = [Spend.username == username] if username is not None else []
+        for field, value in filters.items():
+            if field not in Spend.model_fields:
+                raise ValidationError("Неизвестное поле траты", field=field, value=str(value))
+            conditions.append(getattr(Spend, field) == value)
+        return conditions
+
+    def _scalar(self, statement, operation: str, username: str = None):
+        try:
+            with self.session() as session:
+                return session.execute(statement).scalar()
+        except Exception as e:
+            raise DatabaseError(f"Ошибка агрегатного запроса: {str(e)}", username=username, operation=operation)
+
+    def _grouped(self, statement, operation: str, username: str = None) -> dict[str, float]:
+        try:
+            with self.session() as session:
+                return {key: float(total) for key, total in session.execute(statement).all()}
+        except Exception as e:
+            raise DatabaseError(f"Ошибка агрегатного запроса: {str(e)}", username=username, operation=operation)
+
+    @allure.step("БД: Количество трат пользователя '{username}'")
+    def count_spends(self, username: str, **filters) -> int:
+        """SELECT count(*) по тратам пользователя с дополнительными фильтрами field=value"""
+        statement = select(func.count()).select_from(Spend).where(*self._spend_filters(username, filters))
+        return self._scalar(statement, "count_spends", username)
+
+    @allure.step("БД: Суммы трат пользователя '{username}' по валютам")
+    def sum_by_currency(self, username: str) -> dict[str, float]:
+        """{currency: сумма amount}"""
+        statement = (
+            select(Spend.currency, func.sum(Spend.amount))
+            .where(Spend.username == username)
+            .group_by(Spend.currency)
+        )
+        return self._grouped(statement, "sum_by_currency", username)
+
+    @allure.step("БД: Суммы трат пользователя '{username}' по категориям")
+    def sum_by_category(self, username: str) -> dict[str, float]:
+        """{имя категории: сумма amount} - валюты не конвертируются"""
+        statement = (
+            select(Category.name, func.sum(Spend.amount))
+            .join(Category, Spend.category_id == Category.id)  # type: ignore
+            .where(Spend.username == username)
+            .group_by(Category.name)
+        )
+        return self._grouped(statement, "sum_by_category", username)
+
+    @allure.step("БД: Проверка существования траты пользователя '{username}'")
+    def exists_spend(self, username: str = None, **filters) -> bool:
+        """SELECT EXISTS(...) по фильтрам field=value"""
+        statement = select(exists().where(*self._spend_filters(username, filters)))
+        return self._scalar(statement, "exists_spend", username)
+
+    @allure.step("БД: Последняя трата пользователя '{username}'")
+    def latest_spend(self, username: str) -> Spend | None:
+        """Трата с самой поздней датой (ORDER BY spend_date DESC LIMIT 1)"""
+        try:
+            with self.session() as session:
+                statement = (
+                    select(Spend)
+                    .where(Spend.username == username)
+                    .order_by(Spend.spend_date.desc())  # type: ignore
+                    .limit(1)
+                )
+                return session.exec(statement).first()
+        except Exception as e:
+            raise DatabaseError(f"Ошибка получения последней траты: {str(e)}", username=username,
+                                operation="latest_spend")
+
+    # Ожидание состояния БД: UI/gateway пишут в БД асинхронно относительно теста
+
+    @allure.step("БД: Установка тестового триггера NOTIFY на spend")
+    def install_notify_trigger(self) -> None:
+        """
+        Установить триггер pg_notify на INSERT в spend (если его еще нет) и включить LISTEN режим wait_for.
+        Триггер удаляется в dispose() последней использовавшей его сессией - схема сервиса не меняется навсегда
+        """
+        if self.engine.dialect.name != "postgresql" or self._notify_guard is not None:
+            return
+        try:
+            guard = self.engine.connect()
+            guard.exec_driver_sql(f"SELECT pg_advisory_lock_shared({NOTIFY_USERS_LOCK})")
+            guard.commit()
+            self._notify_guard = guard
+            with self.engine.begin() as connection:
+                connection.exec_driver_sql(NOTIFY_TRIGGER_DDL)
+        except Exception as e:
+            self.uninstall_notify_trigger()
+            raise DatabaseError(f"Ошибка установки триггера: {str(e)}", operation="install_notify_trigger")
+        self.notify_channel = NOTIFY_CHANNEL
+
+    def uninstall_notify_trigger(self) -> None:
+        """Перестать использовать триггер NOTIFY; удалить его, если других сессий с ним нет"""
+        guard, self._notify_guard = self._notify_guard, None
+        self.notify_channel = None
+        if guard is None:
+            return
+        with allure.step("БД: Удаление тестового триггера NOTIFY на spend"):
+            try:
+                guard.exec_driver_sql(f"SELECT pg_advisory_unlock_shared({NOTIFY_USERS_LOCK})")
+                if guard.exec_driver_sql(f"SELECT pg_try_advisory_lock({NOTIFY_USERS_LOCK})").scalar():
+                    guard.exec_driver_sql(NOTIFY_TRIGGER_DROP_DDL)
+                    guard.exec_driver_sql(f"SELECT pg_advisory_unlock({NOTIFY_USERS_LOCK})")
+                guard.commit()
+            except Exception as e:
+                # Соединение с незакрытыми advisory lock нельзя возвращать в пул
+                guard.invalidate()
+                raise DatabaseError(f"Ошибка удаления триггера: {str(e)}", operation="uninstall_notify_trigger")
+            finally:
+                guard.close()
+
+    @contextmanager
+    def _listener(self) -> Iterator[Callable[[float], None]]:
+        """
+        Отдельное соединение с LISTEN на notify_channel; отдает функцию ожидания,
+        которая возвращается по первому уведомлению или по таймауту
+        """
+        raw_connection = self.engine.raw_connection()
+        connection = raw_connection.driver_connection
+        connection.autocommit = True
+        cursor = connection.cursor()
+        cursor.execute(f"LISTEN {self.notify_channel}")
+
+        def wait(seconds: float) -> None:
+            if io_select.select([connection], [], [], seconds)[0]:
+                connection.poll()
+                connection.notifies.clear()
+
+        try:
+            yield wait
+        finally:
+            cursor.execute(f"UNLISTEN {self.notify_channel}")
+            cursor.close()
+            connection.autocommit = False
+            raw_connection.close()
+
+    def wait_for(
+            self,
+            predicate_query: Executable,
+            timeout: float = 10.0,
+            poll_interval: float = 0.05,
+            max_interval: float = 1.0
+    ) -> Any:
+        """
+        Ждать, пока скалярный запрос (EXISTS/COUNT ... HAVING) вернет значение, и вернуть его.
+        Не выполнено: None (нет строки, например HAVING отфильтровал) или False (EXISTS); 0 - готовое значение.
+
+        Опрос с экспоненциальной паузой poll_interval * 2^n до max_interval. Если установлен триггер
+        (install_notify_trigger), между проверками ждем NOTIFY - проверка повторяется сразу после
+        commit вставки. Внутри isolated() используется только опрос: NOTIFY приходит лишь после commit
+        """
+        with allure.step(f"БД: Ожидание условия (до {timeout}s)"):
+            use_notify = self.notify_channel is not None and self.bind is self.engine
+            deadline = time.monotonic() + timeout
+            interval = poll_interval
+            attempts = 0
+            with self._listener() if use_notify else nullcontext(time.sleep) as wait:
+                while True:
+                    attempts += 1
+                    value = self._scalar(predicate_query, "wait_for")
+                    if value is not None and value is not False:
+                        allure.attach(f"Попыток: {attempts}, значение: {value}", name="DB Wait")
+                        return value
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise DatabaseError(f"Условие не выполнилось за {timeout}s ({attempts} проверок)",
+                                            operation="wait_for")
+                    wait(min(interval, remaining))
+                    interval = min(interval * 2, max_interval)
+
+    def wait_for_spend(self, username: str, timeout: float = 10.0, **filters) -> bool:
+        """Ждать появления траты пользователя с полями field=value"""
+        statement = select(exists().where(*self._spend_filters(username, filters)))
+        return self.wait_for(statement, timeout=timeout)
+
+    def wait_for_spend_count(self, username: str, expected: int, timeout: float = 10.0) -> int:
+        """Ждать, пока у пользователя станет не меньше expected трат, и вернуть их количество"""
+        count = func.count()
+        statement = select(count).select_from(Spend).where(Spend.username == username).having(count >= expected)
+        try:
+            return self.wait_for(statement, timeout=timeout)
+        except DatabaseError:
+            actual = self.count_spends(username)
+            raise DatabaseError(f"Ожидали не меньше {expected} трат, в БД {actual}", username=username,
+                                operation="wait_for_spend_count")
+
+    # Снимок и diff: проверка стоит пропорционально изменениям, а не всей истории пользователя
+
+    @allure.step("БД: Снимок трат пользователя '{username}'")
+    def snapshot(self, username: str) -> SpendSnapshot:
+        """Хэши содержимого всех трат пользователя (id -> md5), посчитанные в БД"""
+        statement = select(Spend.id, SPEND_ROW_HASH).where(Spend.username == username)
+        hashes = {str(spend_id): row_hash for spend_id, row_hash in self._rows(statement, "snapshot", username)}
+        allure.attach(f"Трат в снимке: {len(hashes)}", name="DB Snapshot")
+        return SpendSnapshot(username=username, hashes=hashes)
+
+    @allure.step("БД: Изменения трат относительно снимка")
+    def diff(self, snapshot: SpendSnapshot) -> SpendDiff:
+        """Добавленные, удаленные и измененные траты; полные строки читаются только для added/changed"""
+        current = self.snapshot(snapshot.username).hashes
+        added = [spend_id for spend_id in current if spend_id not in snapshot.hashes]
+        changed = [spend_id for spend_id, row_hash in current.items()
+                   if spend_id in snapshot.hashes and snapshot.hashes[spend_id] != row_hash]
+        rows = {}
+        if added or changed:
+            statement = select(*SPEND_ROW_COLUMNS).where(Spend.id.in_(added + changed))
+            rows = {str(row.id): SpendRow._make(row) for row in self._rows(statement, "diff", snapshot.username)}
+        result = SpendDiff(
+            added=[rows[spend_id] for spend_id in added if spend_id in rows],
+            removed=[spend_id for spend_id in snapshot.hashes if spend_id not in current],
+            changed=[rows[spend_id] for spend_id in changed if spend_id in rows],
+        )
+        allure.attach(
+            f"added: {len(result.added)}, removed: {len(result.removed)}, changed: {len(result.changed)}",
+            name="DB Diff"
+        )
+        return result
+
+    # Массовая загрузка: COPY FROM STDIN в Postgres, пачки executemany в SQLite замене
+
+    def _transaction(self) -> ContextManager[Connection]:
+        """Транзакция для записи: новая с commit на выходе или внешняя транзакция isolated()"""
+        return self.engine.begin() if isinstance(self.bind, Engine) else nullcontext(self.bind)
+
+    @staticmethod
+    def _copy(connection: Connection, table: str, columns: Sequence[str], rows: Iterable[NamedTuple]) -> int:
+        stream = CopyStream(rows)
+        with connection.connection.driver_connection.cursor() as cursor:
+            cursor.copy_expert(f"COPY {table} ({', '.join(columns)}) FROM STDIN", stream, size=1 << 16)
+        return stream.count
+
+    @staticmethod
+    def _insert_chunks(connection: Connection, table, rows: Iterable[NamedTuple], chunk_size: int = 5000) -> int:
+        count = 0
+        rows = iter(rows)
+        while chunk := [row._asdict() for row in itertools.islice(rows, chunk_size)]:
+            connection.execute(insert(table), chunk)
+            count += len(chunk)
+        return count
+
+    def load_dataset(
+            self,
+            categories: Iterable[CategoryRow],
+            spends: Iterable[SpendRow],
+            username: str = None
+    ) -> dict[str, int]:
+        """
+        Загрузить строки в одной транзакции: категории, затем траты (например, из SpendDatasetBuilder).
+        В Postgres строки идут потоком через COPY FROM STDIN, без INSERT на каждую строку
+        """
+        with allure.step(f"БД: Загрузка набора трат для '{username}'"):
+            started = time.monotonic()
+            try:
+                with self._transaction() as connection:
+                    if self.engine.dialect.name == "postgresql":
+                        counts = {
+                            "categories": self._copy(connection, "category", CategoryRow._fields, categories),
+                            "spends": self._copy(connection, "spend", SpendRow._fields, spends),
+                        }
+                    else:
+                        counts = {
+                            "categories": self._insert_chunks(connection, Category.__table__, categories),
+                            "spends": self._insert_chunks(connection, Spend.__table__, spends),
+                        }
+            except Exception as e:
+                raise DatabaseError(f"Ошибка загрузки набора: {str(e)}", username=username,
+                                    operation="load_dataset")
+            allure.attach(f"{counts} за {time.monotonic() - started:.2f}s", name="Dataset Loaded")
+            return counts
@@ -0,0 +1,62 @@
+import hashlib
+
+from sqlalchemy import Engine, event
+
+# Схема niffler-spend (миграции V1-V4 из niffler-spend/src/main/resources/db/migration) для SQLite:
+# те же NOT NULL, уникальный индекс (name, username) и FK spend.category_id -> category.id.
+# UUID хранится текстом, default генерирует строку в формате UUID
+_UUID_DEFAULT = (
+    "(lower(hex(randomblob(4)) || '-' || hex(randomblob(2)) || '-' || hex(randomblob(2)) || '-' "
+    "|| hex(randomblob(2)) || '-' || hex(randomblob(6))))"
+)
+
+SQLITE_SCHEMA = [
+    f"""
+    CREATE TABLE IF NOT EXISTS category (
+        id       VARCHAR(36)  NOT NULL DEFAULT {_UUID_DEFAULT} PRIMARY KEY,
+        name     VARCHAR(255) NOT NULL,
+        username VARCHAR(50)  NOT NULL,
+        archived BOOLEAN      NOT NULL DEFAULT 0
+    )
+    """,
+    "CREATE UNIQUE INDEX IF NOT EXISTS ix_category_username ON category (name, username)",
+    f"""
+    CREATE TABLE IF NOT EXISTS spend (
+        id          VARCHAR(36)  NOT NULL DEFAULT {_UUID_DEFAULT} PRIMARY KEY,
+        username    VARCHAR(50)  NOT NULL,
+        spend_date  DATE         NOT NULL,
+        currency    VARCHAR(50)  NOT NULL,
+        amount      FLOAT        NOT NULL,
+        description VARCHAR(255) NOT NULL,
+        category_id VARCHAR(36)  NOT NULL,
+        CONSTRAINT fk_spend_category FOREIGN KEY (category_id) REFERENCES category (id)
+    )
+    """,
+]
+
+
+def configure_sqlite(engine: Engine) -> None:
+    """
+    Подготовка SQLite engine как замены Postgres niffler-spend:
+    включение FK, транзакции под управлением SQLAlchemy (нужно для SAVEPOINT в isolated()) и схема
+    """
+    @event.listens_for(engine, "connect")
+    def on_connect(dbapi_connection, _connection_record):
+        # pysqlite сам открывает/закрывает транзакции и ломает SAVEPOINT - отключаем это
+        dbapi_connection.isolation_level = None
+        dbapi_connection.execute("PRAGMA foreign_keys = ON")
+        # WAL: чтение из других соединений не ждет пишущую транзакцию (как MVCC в Postgres)
+        dbapi_connection.execute("PRAGMA journal_mode = WAL")
+        # md5() для SpendDb.snapshot - в Postgres встроенная
+        dbapi_connection.create_function(
+            "md5", 1, lambda value: hashlib.md5(value.encode()).hexdigest() if value is not None else None,
+            deterministic=True
+        )
+
+    @event.listens_for(engine, "begin")
+    def on_begin(connection):
+        connection.exec_driver_sql("BEGIN")
+
+    with engine.begin() as connection:
+        for statement in SQLITE_SCHEMA:
+            connection.exec_driver_sql(statement)
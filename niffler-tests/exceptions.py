@@ -30,3 +30,20 @@ class ValidationError(NifflerError):
         self.field = field
         self.value = value
         super().__init__(f"VALIDATION ERROR [{field}='{value}']: {message}")
+
+
+class CircuitOpenError(NifflerError):
+    """Сервис считается недоступным - запрос не отправляется (circuit breaker открыт)"""
+
+    def __init__(self, service: str, retry_in: float):
+        self.service = service
+        self.retry_in = retry_in
+        super().__init__(f"CIRCUIT OPEN [{service}]: сервис недоступен, следующая попытка через {retry_in:.1f}s")
+
+
+class CassetteMissError(NifflerError):
+    """В кассете нет записанного ответа для запроса (режим replay)"""
+
+    def __init__(self, cassette: str, message: str):
+        self.cassette = cassette
+        super().__init__(f"CASSETTE MISS [{cassette}]: {message}")
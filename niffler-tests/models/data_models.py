@@ -1,6 +1,7 @@
-from pydantic import BaseModel
+from pydantic import AliasChoices, AliasPath, BaseModel, field_serializer, field_validator
 from sqlmodel import SQLModel, Field
 from datetime import date
+from typing import NamedTuple
 
 
 class UserData(BaseModel):
@@ -25,14 +26,39 @@ class Category(SQLModel, table=True):
     archived: bool = False
 
 
-class Spend(SQLModel, table=True):
+class SpendBase(SQLModel):
+    """Поля траты без table=True - для TypeAdapter/пакетной валидации JSON (table-модели pydantic не валидирует)"""
     id: str = Field(default=None, primary_key=True)
     username: str
-    spend_date: date
+    # Алиасы позволяют валидировать в ту же модель JSON от gateway (spendDate, category.id)
+    spend_date: date = Field(schema_extra={"validation_alias": AliasChoices("spend_date", "spendDate")})
     currency: str
     amount: float
     description: str
-    category_id: str
+    category_id: str = Field(
+        schema_extra={"validation_alias": AliasChoices("category_id", AliasPath("category", "id"))}
+    )
+
+    @field_validator("spend_date", mode="before")
+    @classmethod
+    def parse_spend_date(cls, value):
+        """Gateway отдает spendDate как ISO datetime - оставляем только дату"""
+        if isinstance(value, str) and "T" in value:
+            return value.split("T", 1)[0]
+        return value
+
+
+class Spend(SpendBase, table=True):
+    """Таблица spend БД niffler-spend"""
+
+
+class SpendPage(BaseModel):
+    """Страница /api/v2/spends/all (Spring Page<SpendJson>)"""
+    content: list[SpendBase]
+    last: bool
+    number: int = 0
+    totalPages: int = 0
+    totalElements: int = 0
 
 
 class SpendAdd(SQLModel):
@@ -41,3 +67,57 @@ class SpendAdd(SQLModel):
     category: str
     spendDate: str
     currency: str
+
+    @field_serializer("category")
+    def serialize_category(self, category: str) -> dict:
+        """Gateway ожидает категорию объектом CategoryJson, а не строкой"""
+        return {"name": category}
+
+
+class BulkItemResult(BaseModel):
+    """Результат одного элемента bulk операции (порядок совпадает с входными данными)"""
+    index: int
+    result: Spend | Category | None = None
+    error: str | None = None
+    attempts: int = 1
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+# Read-only проекции строк БД: кортежи без __dict__ и без отслеживания сессией
+class SpendRow(NamedTuple):
+    """Строка таблицы spend (только чтение)"""
+    id: str
+    username: str
+    spend_date: date
+    currency: str
+    amount: float
+    description: str
+    category_id: str
+
+
+class CategoryRow(NamedTuple):
+    """Строка таблицы category (только чтение)"""
+    id: str
+    name: str
+    username: str
+    archived: bool
+
+
+class SpendSnapshot(BaseModel):
+    """Снимок трат пользователя: id -> хэш содержимого строки, посчитанный в БД"""
+    username: str
+    hashes: dict[str, str]
+
+
+class SpendDiff(BaseModel):
+    """Изменения трат относительно снимка"""
+    added: list[SpendRow] = []
+    removed: list[str] = []  # id удаленных трат - самих строк уже нет
+    changed: list[SpendRow] = []
+
+    @property
+    def empty(self) -> bool:
+        return not (self.added or self.removed or self.changed)
@@ -1,6 +1,7 @@
 from abc import ABC, abstractmethod
-from playwright.sync_api import Page
+from playwright.sync_api import Page, TimeoutError as PlaywrightTimeoutError
 from typing import Any
+from .readiness import NetworkIdle, ReadyCondition
 import allure
 
 
@@ -9,6 +10,9 @@ class BasePage(ABC):
     Базовая страница для всех остальных страниц
     """
 
+    # Условие готовности страницы для navigate_to (None - networkidle)
+    READY: ReadyCondition | None = None
+
     def __init__(self, page: Page, environment: dict[str, Any] = None) -> None:
         self.page = page
         self.environment = environment or {}
@@ -16,11 +20,25 @@ class BasePage(ABC):
     @allure.step("Переход по URL: {url}")
     def navigate_to(self, url: str) -> None:
         """
-        Переходим на нужную страницу и ждем пока она полностью загрузится
-        networkidle опция, используемая для определения момента, когда страница считается загруженной
+        Переходим на нужную страницу и ждем ее условие готовности READY (ключевой элемент или ответ API).
+        networkidle - только если условия нет или оно не выполнилось за свой таймаут
         """
-        self.page.goto(url)
-        self.page.wait_for_load_state("networkidle")
+        condition = self.READY or NetworkIdle()
+        navigated = False
+
+        def navigate() -> None:
+            nonlocal navigated
+            self.page.goto(url)
+            navigated = True
+
+        try:
+            condition.wait(self.page, navigate)
+        except PlaywrightTimeoutError:
+            # Таймаут самого goto или networkidle - настоящая ошибка, не повод для fallback
+            if not navigated or isinstance(condition, NetworkIdle):
+                raise
+            allure.attach(f"Не выполнилось: {condition}, ждем networkidle", name="Page Readiness")
+            self.page.wait_for_load_state("networkidle")
 
     def get_full_url(self, base_key: str, endpoint: str = "") -> str:
         """
@@ -1,5 +1,6 @@
 import allure
 from .base_page import BasePage
+from .readiness import LocatorVisible
 from playwright.sync_api import Page
 from typing import Any
 from config import Config
@@ -8,6 +9,8 @@ from config import Config
 class LoginPage(BasePage):
     """Страница входа в систему"""
 
+    READY = LocatorVisible('input[name="username"]')
+
     def __init__(self, page: Page, environment: dict[str, Any] = None) -> None:
         super().__init__(page, environment)
 
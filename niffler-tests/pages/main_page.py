@@ -1,4 +1,5 @@
 from .base_page import BasePage
+from .readiness import ResponseReceived
 from playwright.sync_api import Page
 from typing import Any
 
@@ -6,6 +7,9 @@ from typing import Any
 class MainPage(BasePage):
     """Главная страница приложения после входа в систему"""
 
+    # Таблица трат рендерится из ответа /api/v2/spends/all
+    READY = ResponseReceived("/api/v2/spends/all")
+
     def __init__(self, page: Page, environment: dict[str, Any] = None) -> None:
         super().__init__(page, environment)
 
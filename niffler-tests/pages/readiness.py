@@ -0,0 +1,65 @@
+from abc import ABC, abstractmethod
+from typing import Callable
+
+from playwright.sync_api import Page
+
+
+class ReadyCondition(ABC):
+    """
+    Условие готовности страницы после перехода
+
+    Условие само вызывает переход (navigate): ожидание ответа API нужно начать до goto,
+    иначе быстрый ответ можно пропустить
+    """
+
+    def __init__(self, timeout: float = 10000):
+        self.timeout = timeout
+
+    @abstractmethod
+    def wait(self, page: Page, navigate: Callable[[], None]) -> None:
+        pass
+
+
+class LocatorVisible(ReadyCondition):
+    """Страница готова, когда виден ключевой элемент"""
+
+    def __init__(self, selector: str, timeout: float = 10000):
+        super().__init__(timeout)
+        self.selector = selector
+
+    def wait(self, page: Page, navigate: Callable[[], None]) -> None:
+        navigate()
+        page.locator(self.selector).first.wait_for(state="visible", timeout=self.timeout)
+
+    def __str__(self) -> str:
+        return f"locator {self.selector}"
+
+
+class ResponseReceived(ReadyCondition):
+    """Страница готова, когда пришел ответ API, из которого она рендерит данные"""
+
+    def __init__(self, url_part: str, method: str = "GET", timeout: float = 10000):
+        super().__init__(timeout)
+        self.url_part = url_part
+        self.method = method
+
+    def wait(self, page: Page, navigate: Callable[[], None]) -> None:
+        with page.expect_response(
+                lambda response: self.url_part in response.url and response.request.method == self.method,
+                timeout=self.timeout
+        ):
+            navigate()
+
+    def __str__(self) -> str:
+        return f"response {self.method} {self.url_part}"
+
+
+class NetworkIdle(ReadyCondition):
+    """Нет сетевых запросов 500 ms - для страниц без своего условия (таймаут - дефолтный у страницы)"""
+
+    def wait(self, page: Page, navigate: Callable[[], None]) -> None:
+        navigate()
+        page.wait_for_load_state("networkidle")
+
+    def __str__(self) -> str:
+        return "networkidle"
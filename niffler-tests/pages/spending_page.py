@@ -1,5 +1,6 @@
 import allure
 from .base_page import BasePage
+from .readiness import LocatorVisible
 from playwright.sync_api import Page
 from typing import Any
 
@@ -7,6 +8,8 @@ from typing import Any
 class SpendingPage(BasePage):
     """Страница расходов"""
 
+    READY = LocatorVisible('input[name="amount"]')
+
     def __init__(self, page: Page, environment: dict[str, Any] = None) -> None:
         super().__init__(page, environment)
 
@@ -1,16 +1,26 @@
-from playwright.sync_api import Browser, BrowserContext, Page, sync_playwright
+from playwright.sync_api import Browser, BrowserContext, Page
+from clients.async_spends_client import AsyncSpendsHttpClient
+from clients.auth_session import AuthSession
+from clients.auth_state import AuthStateValidator, prelogin
+from clients.cassette import Cassette
 from clients.spends_client import SpendsHttpClient
-from clients.oauth_client import OAuthClient
+from clients.oauth_client import OAuthClient, OAuthToken
+from clients.token_cache import TokenCache
+from clients.user_pool import PooledUser, UserPool
+from clients import resilience
 from pages.spending_page import SpendingPage
 from actions.auth_actions import AuthActions
 from builders.user_builder import UserBuilder
 from pytest import FixtureDef, FixtureRequest
+from utils.context_pool import ContextPool
+from utils.file_lock import FileLock, atomic_write_text
+from utils.net_profile import NET_PROFILES, NetProfile
 from models.data_models import UserData
 from pages.login_page import LoginPage
 from pages.main_page import MainPage
+from data_bases.query_stats import QueryStats
 from data_bases.spend_db import SpendDb
-from typing import Generator
-from urllib.parse import urljoin
+from typing import AsyncGenerator, Generator
 
 from config import Config
 from pathlib import Path
@@ -32,7 +42,27 @@ def pytest_addoption(parser) -> None:
         "--env",
         action="store",
         default="docker",
-        help="Environment: local, docker, staging",
+        help="Environment: local, docker, staging, mock (SQLite вместо niffler-spend)",
+    )
+    parser.addoption(
+        "--user-pool",
+        action="store",
+        type=int,
+        default=0,
+        help="Размер пула заранее зарегистрированных пользователей (0 - shared_user по timestamp)",
+    )
+    parser.addoption(
+        "--net-profile",
+        action="store",
+        default=os.getenv("NET_PROFILE", "full"),
+        choices=sorted(NET_PROFILES),
+        help="Профиль сети браузера: full - все ресурсы, lean - без картинок/шрифтов/медиа и с заглушкой статистики",
+    )
+    parser.addoption(
+        "--auth-prelogin",
+        action="store_true",
+        default=False,
+        help="Контроллер xdist заранее логинит shared_user каждого воркера по HTTP и передает ему state-файл",
     )
 
 
@@ -63,10 +93,17 @@ def pytest_configure(config) -> None:
 
 @pytest.hookimpl(tryfirst=True, hookwrapper=True)
 def pytest_runtest_makereport(item, call):
-    """Автоматические скриншоты и видео при падении тестов"""
+    """Автоматические скриншоты, видео и HTTP обмены при падении тестов"""
     outcome = yield
     rep = outcome.get_result()
+    # rep_setup / rep_call / rep_teardown - фикстурам нужно знать, упал ли тест
+    setattr(item, f"rep_{rep.when}", rep)
     if rep.when == "call" and rep.failed:
+        # Отложенные HTTP запросы/ответы клиентов (политика HTTP_CAPTURE_POLICY)
+        for client_fixture in ("spends_client", "async_spends_client"):
+            if client_fixture in item.funcargs:
+                item.funcargs[client_fixture].capture.flush_pending()
+
         if "page" in item.fixturenames:
             page = item.funcargs["page"]
 
@@ -89,6 +126,62 @@ def pytest_runtest_makereport(item, call):
                     )
 
 
+def shared_username(worker: str) -> str:
+    """Имя shared_user: timestamp + id воркера, чтобы воркеры, стартовавшие в одну секунду, не совпали"""
+    return f"test_user_{int(time.time() % 100000)}_{worker}"
+
+
+def prelogged_user(config) -> dict | None:
+    """Пользователь, которого контроллер xdist залогинил для этого воркера (--auth-prelogin)"""
+    return getattr(config, "workerinput", {}).get("shared_user")
+
+
+def auth_state_path(username: str) -> Path:
+    return Path(".pytest_cache") / f"auth_{username}.json"
+
+
+@pytest.hookimpl(optionalhook=True)
+def pytest_configure_node(node) -> None:
+    """Pre-login на контроллере (хук pytest-xdist): воркер получает пользователя и готовый state-файл"""
+    if not node.config.getoption("--auth-prelogin") or node.config.getoption("--user-pool"):
+        return
+    environment = Config.get_env_config(node.config.getoption("--env"))
+    user = UserBuilder().with_username(shared_username(node.gateway.id)).with_password("TestPass123").build()
+    try:
+        state_file = prelogin(environment, user.username, user.password, auth_state_path(user.username))
+    except Exception as error:
+        # Воркер залогинится сам через UI
+        reporter = node.config.pluginmanager.get_plugin("terminalreporter")
+        if reporter:
+            reporter.write_line(f"[{node.gateway.id}] pre-login {user.username} не удался: {error}")
+        return
+    node.workerinput["shared_user"] = {
+        "username": user.username,
+        "password": user.password,
+        "state_file": str(state_file.resolve()),
+    }
+
+
+def pytest_sessionfinish(session) -> None:
+    """Передача счетчиков retry/circuit breaker с xdist воркера на контроллер"""
+    if hasattr(session.config, "workeroutput"):
+        session.config.workeroutput["http_resilience"] = dict(resilience.stats)
+
+
+@pytest.hookimpl(optionalhook=True)
+def pytest_testnodedown(node, error) -> None:
+    """Суммирование счетчиков воркеров на контроллере (хук pytest-xdist)"""
+    resilience.stats.update(getattr(node, "workeroutput", {}).get("http_resilience", {}))
+
+
+def pytest_terminal_summary(terminalreporter) -> None:
+    """Сводка по повторам HTTP запросов и открытым circuit breaker"""
+    if resilience.stats:
+        terminalreporter.write_sep("-", "HTTP resilience")
+        for name, value in sorted(resilience.stats.items()):
+            terminalreporter.write_line(f"{name}: {value}")
+
+
 def allure_logger(config):
     """Получение Allure логгера"""
     listener = config.pluginmanager.get_plugin("allure_listener")
@@ -97,10 +190,25 @@ def allure_logger(config):
 
 @pytest.hookimpl(hookwrapper=True, trylast=True)
 def pytest_runtest_call(item):
-    """Автоматическое название тестов в Allure"""
-    yield
+    """Автоматическое название тестов в Allure и проверка маркера query_budget"""
+    outcome = yield
     allure.dynamic.title(" ".join(item.name.split("_")[1:]).title())
 
+    marker = item.get_closest_marker("query_budget")
+    stats = getattr(item, "db_query_stats", None)
+    if marker and stats and outcome.excinfo is None:
+        max_queries = marker.kwargs.get("max_queries")
+        max_ms = marker.kwargs.get("max_ms")
+        violations = []
+        if max_queries is not None and stats.count > max_queries:
+            violations.append(f"запросов {stats.count} > {max_queries}")
+        if max_ms is not None and stats.total_ms > max_ms:
+            violations.append(f"время {stats.total_ms:.1f} ms > {max_ms} ms")
+        if violations:
+            outcome.force_exception(pytest.fail.Exception(
+                f"Превышен query_budget: {', '.join(violations)}\n{stats.summary()}", pytrace=False
+            ))
+
 
 @pytest.hookimpl(hookwrapper=True, trylast=True)
 def pytest_fixture_setup(fixturedef: FixtureDef, request: FixtureRequest):
@@ -138,10 +246,16 @@ def browser(playwright) -> Generator[Browser, None, None]:
         browser.close()
 
 
-@pytest.fixture(scope="function")
-def context(browser) -> Generator[BrowserContext, None, None]:
-    """Браузер контекст с фиксированным размером окна"""
-    with allure.step("[F] Create Browser Context"):
+@pytest.fixture(scope="session")
+def net_profile(request) -> NetProfile:
+    """Профиль сети для браузер контекстов (--net-profile)"""
+    return NET_PROFILES[request.config.getoption("--net-profile")]
+
+
+@pytest.fixture(scope="session")
+def context_pool(browser, net_profile: NetProfile) -> Generator[ContextPool, None, None]:
+    """Пул прогретых браузер контекстов с фиксированным размером окна (один на воркер)"""
+    with allure.step("[S] Create Browser Context Pool"):
         # Таймаут из .env или дефолтное значение
         timeout = int(os.getenv("BROWSER_TIMEOUT", "30000"))
 
@@ -160,80 +274,170 @@ def context(browser) -> Generator[BrowserContext, None, None]:
                 }
             )
 
-        browser_context = browser.new_context(**context_options)
-        browser_context.set_default_timeout(timeout)
-        allure.attach(json.dumps(context_options, indent=2), name="Context Options",
+        # Видео пишется на контекст целиком - с записью каждый тест получает свой контекст
+        max_uses = 1 if record_video else int(os.getenv("CONTEXT_POOL_MAX_USES", "20"))
+        # route профиля сети переустанавливаются после каждого сброса контекста
+        pool = ContextPool(browser, context_options, timeout, max_uses=max_uses, setup=net_profile.install)
+        allure.attach(json.dumps({**context_options, "max_uses": max_uses, "net_profile": net_profile.name}, indent=2),
+                      name="Context Options",
                       attachment_type=allure.attachment_type.JSON)
-        yield browser_context
-    with allure.step("[F] Close Browser Context"):
-        browser_context.close()
+    yield pool
+    with allure.step("[S] Close Browser Context Pool"):
+        pool.close()
+
+
+def call_failed(request) -> bool:
+    """Упал ли тест (rep_call выставляет pytest_runtest_makereport) - такой контекст не переиспользуем"""
+    report = getattr(request.node, "rep_call", None)
+    return report is None or report.failed
+
+
+def apply_full_network_marker(request, browser_context: BrowserContext) -> None:
+    """Маркер full_network: тесту нужны все ресурсы (визуальные проверки) - снимаем route профиля сети"""
+    if request.node.get_closest_marker("full_network"):
+        browser_context.unroute_all(behavior="ignoreErrors")
+
+
+@pytest.fixture(scope="function")
+def context(request, context_pool: ContextPool) -> Generator[BrowserContext, None, None]:
+    """Браузер контекст без авторизации из пула, сбрасывается после теста"""
+    with allure.step("[F] Acquire Browser Context"):
+        browser_context = context_pool.acquire()
+        apply_full_network_marker(request, browser_context)
+    yield browser_context
+    with allure.step("[F] Release Browser Context"):
+        context_pool.release(browser_context, recycle=call_failed(request))
 
 
 # ===============================
 # SHARED AUTHENTICATION
 # ===============================
 
+def register_user_http(environment: dict, user: UserData, cassette: Cassette | None = None) -> bool:
+    """Регистрация через форму /register по HTTP (CSRF cookie + POST) вместо отдельного браузера"""
+    with allure.step(f"Регистрация пользователя '{user.username}' по HTTP"):
+        created = AuthSession(environment["auth_url"], cassette=cassette).register(user.username, user.password)
+        allure.attach(f"Создан: {created}", name="Registration Result")
+        return created
+
+
+@pytest.fixture(scope="session")
+def user_pool(request, environment: dict) -> UserPool | None:
+    """Пул пользователей, зарегистрированных по HTTP (включается опцией --user-pool=N)"""
+    size = request.config.getoption("--user-pool")
+    if not size:
+        return None
+    with allure.step("[S] Provision User Pool"):
+        pool = UserPool(environment)
+        pool.provision(size)
+        return pool
+
+
 @pytest.fixture(scope="session")
-def shared_user() -> UserData:
-    """Пользователь для shared авторизации с timestamp для уникальности"""
+def shared_user(request, user_pool: UserPool | None) -> Generator[UserData, None, None]:
+    """
+    Пользователь для shared авторизации: из пула (эксклюзивно на воркер),
+    заранее залогиненный контроллером (--auth-prelogin) или с timestamp и id воркера
+    """
+    worker = os.getenv("PYTEST_XDIST_WORKER", "master")
+    if user_pool:
+        with allure.step("[S] Lease Shared User From Pool"):
+            pooled = user_pool.lease(worker)
+            yield UserData(username=pooled.username, password=pooled.password)
+        user_pool.release(worker)
+        return
+
+    prelogged = prelogged_user(request.config)
+    if prelogged:
+        with allure.step("[S] Use Pre-Logged Shared User"):
+            allure.attach(f"Username: {prelogged['username']}", name="Shared User")
+            yield UserData(username=prelogged["username"], password=prelogged["password"])
+        return
+
     with allure.step("[S] Generate Shared User Data"):
-        timestamp = int(time.time() % 100000)
-        username = f"test_user_{timestamp}"
-        user = UserBuilder().with_username(username).with_password("TestPass123").build()
+        user = UserBuilder().with_username(shared_username(worker)).with_password("TestPass123").build()
         allure.attach(f"Username: {user.username}", name="Shared User")
-        return user
+        yield user
+
+
+@pytest.fixture
+def exclusive_user(request, user_pool: UserPool | None) -> Generator[UserData, None, None]:
+    """Отдельный пользователь из пула только для этого теста (требует --user-pool)"""
+    if not user_pool:
+        pytest.skip("exclusive_user требует --user-pool=N")
+    owner = f"{os.getenv('PYTEST_XDIST_WORKER', 'master')}:{request.node.nodeid}"
+    pooled = user_pool.lease(owner)
+    yield UserData(username=pooled.username, password=pooled.password)
+    user_pool.release(owner)
 
 
 @pytest.fixture(scope="session")
-def auth_state_file(shared_user: UserData) -> Path:
-    """Файл для хранения состояния авторизации"""
+def auth_state_file(request, shared_user: UserData, user_pool: UserPool | None) -> Path:
+    """Файл для хранения состояния авторизации (для пользователя из пула или после pre-login - уже авторизованный)"""
+    prelogged = prelogged_user(request.config)
     with allure.step("[S] Prepare Auth State File"):
-        auth_file = Path(".pytest_cache") / f"auth_{shared_user.username}.json"
-        auth_file.parent.mkdir(exist_ok=True)
+        if prelogged:
+            auth_file = Path(prelogged["state_file"])
+        elif user_pool:
+            auth_file = user_pool.storage_state(PooledUser(username=shared_user.username, password=shared_user.password))
+        else:
+            # Имя пользователя уникально на воркер, поэтому и файл у каждого воркера свой
+            auth_file = auth_state_path(shared_user.username)
+            auth_file.parent.mkdir(exist_ok=True)
         allure.attach(f"Auth state file path: {auth_file}", name="Auth State File Info")
         return auth_file
 
 
+@pytest.fixture(scope="session")
+def auth_state_validator(environment: dict) -> AuthStateValidator:
+    """Проверка storage state по сроку id_token/cookies (или /api/session/current) без загрузки /main"""
+    return AuthStateValidator.from_env(environment)
+
+
 @pytest.fixture(scope="function")
 def authenticated_page(
+        request,
         browser: Browser,
+        context_pool: ContextPool,
         auth_state_file: Path,
+        auth_state_validator: AuthStateValidator,
+        net_profile: NetProfile,
         shared_user: UserData,
         environment: dict
 ) -> Generator[Page, None, None]:
     """
-    Эта фикстура гарантирует, что пользователь залогинен в браузере
+    Эта фикстура гарантирует, что пользователь залогинен в браузере.
+    Контекст берется из пула уже авторизованным и возвращается в него после теста.
+    State-файл читается и перезаписывается под FileLock и атомарно (не удаляется) -
+    другой процесс никогда не увидит его отсутствующим или полузаписанным
     """
-    if auth_state_file.exists():
-        context = browser.new_context(storage_state=auth_state_file)
-        page = context.new_page()
-        page.goto(urljoin(environment["frontend_url"], "/main"))
-        # Простая проверка, что мы действительно залогинены
-        try:
-            page.locator('a[href*="/people"]').wait_for(timeout=3000)
-            yield page
-            context.close()
-            return
-        except Exception:
-            context.close()
-            auth_state_file.unlink()
-
-    # Если state-файл не существует или невалиден, создаем новый
-    context = browser.new_context()
-    page = context.new_page()
-    login_page = LoginPage(page, environment)
-    auth_actions = AuthActions(login_page)
-    try:
-        # Пытаемся залогиниться
-        auth_actions.login_user(shared_user.username, shared_user.password)
-    except Exception:
-        # Если не получилось - регистрируемся и логинимся снова
-        auth_actions.register_user(shared_user.username, shared_user.password)
-        auth_actions.login_user(shared_user.username, shared_user.password)
-
-    context.storage_state(path=auth_state_file)
-    yield page
-    context.close()
+    with FileLock(auth_state_file.with_suffix(".lock")):
+        # Логин через UI только если state-файла нет или он истек
+        if not auth_state_validator.is_valid(auth_state_file):
+            context_pool.invalidate(auth_state_file)
+            login_context = browser.new_context()
+            # Контекст закрывается и при неудачном логине - иначе он живет до конца сессии браузера
+            try:
+                net_profile.install(login_context)
+                login_page = LoginPage(login_context.new_page(), environment)
+                auth_actions = AuthActions(login_page)
+                try:
+                    # Пытаемся залогиниться
+                    auth_actions.login_user(shared_user.username, shared_user.password)
+                except Exception:
+                    # Если не получилось - регистрируемся по HTTP и логинимся снова
+                    register_user_http(environment, shared_user)
+                    auth_actions.login_user(shared_user.username, shared_user.password)
+                atomic_write_text(auth_state_file, json.dumps(login_context.storage_state(), indent=2))
+            finally:
+                login_context.close()
+
+        context = context_pool.acquire(auth_state_file)
+    apply_full_network_marker(request, context)
+    # Страница пустая: первую навигацию делает тест или page object (open() с условием готовности),
+    # без лишней загрузки SPA перед тестом
+    yield context.new_page()
+    context_pool.release(context, recycle=call_failed(request))
 
 
 # ===============================
@@ -247,7 +451,10 @@ def login_page(page: Page, environment: dict) -> LoginPage:
 
 @pytest.fixture
 def main_page(authenticated_page: Page, environment: dict) -> MainPage:
-    return MainPage(authenticated_page, environment)
+    """Главная страница, открытая под shared_user (ждет ответ /api/v2/spends/all, не networkidle)"""
+    main_page = MainPage(authenticated_page, environment)
+    main_page.open()
+    return main_page
 
 
 @pytest.fixture
@@ -280,42 +487,175 @@ def logged_in_user(shared_user: UserData) -> UserData:
 # DB AND API FIXTURES
 # ===================
 
-@pytest.fixture
-def spend_db(environment: dict) -> SpendDb:
-    with allure.step("[F] Connect to Spend Database"):
-        db = SpendDb(environment['spend_db_url'])
+@pytest.fixture(scope="session")
+def spend_db(environment: dict) -> Generator[SpendDb, None, None]:
+    """Один engine с пулом соединений на воркер, закрывается в конце сессии"""
+    with allure.step("[S] Connect to Spend Database"):
+        db = SpendDb.from_env(environment['spend_db_url'])
         allure.attach(f"Connected to DB: {environment['spend_db_url']}", name="DB Connection")
-        return db
+        if os.getenv("DB_WAIT_NOTIFY", "false").lower() == "true":
+            # wait_for просыпается по NOTIFY от тестового триггера вместо опроса; dispose() в конце сессии
+            # удаляет триггер, если он больше не нужен другим воркерам
+            db.install_notify_trigger()
+    with db:
+        yield db
+
+
+@pytest.fixture(autouse=True)
+def db_query_stats(request) -> Generator[QueryStats | None, None, None]:
+    """
+    Статистика SQL запросов теста (количество, время, самые медленные) - в Allure и для маркера
+    @pytest.mark.query_budget(max_queries=..., max_ms=...). Только для тестов, использующих spend_db
+    """
+    if "spend_db" not in request.fixturenames:
+        yield None
+        return
+    spend_db = request.getfixturevalue("spend_db")
+    with spend_db.queries.measure() as stats:
+        request.node.db_query_stats = stats
+        yield stats
+    allure.attach(stats.summary(), name="DB Queries", attachment_type=allure.attachment_type.TEXT)
+
+
+@pytest.fixture
+def isolated_spend_db(spend_db: SpendDb) -> Generator[SpendDb, None, None]:
+    """
+    SpendDb в транзакции, которая откатывается после теста (commit внутри теста - SAVEPOINT).
+    Для тестов, работающих только с БД: данные не видны другим воркерам и не требуют очистки
+    """
+    with spend_db.isolated() as db:
+        allure.attach("Транзакция будет откатена после теста", name="DB Isolation")
+        yield db
 
 
 @pytest.fixture(scope="session")
-def api_token(environment: dict, shared_user: UserData) -> str:
+def auth_cassette() -> Generator[Cassette | None, None, None]:
     """
-    Получает токен для API через полный цикл OAuth 2.0
+    Кассета обменов с auth-сервисом на сессию (HTTP_CASSETTE_MODE=record|replay, по умолчанию off).
+    Одна на xdist воркер - при воспроизведении запускайте с тем же -n, что и при записи
     """
-    with allure.step("[S] Получение API токена через OAuth 2.0 PKCE"):
-        oauth_client = OAuthClient(config=environment)
+    cassette = Cassette.from_env(f"oauth_{os.getenv('PYTEST_XDIST_WORKER', 'master')}")
+    yield cassette
+    if cassette:
+        cassette.save()
+
+
+@pytest.fixture
+def api_cassette(request) -> Generator[Cassette | None, None, None]:
+    """Кассета обменов с gateway на тест - имя по nodeid, сохраняется после теста"""
+    cassette = Cassette.from_env(request.node.nodeid)
+    yield cassette
+    if cassette:
+        cassette.save()
+
+
+@pytest.fixture(scope="session")
+def oauth_client(environment: dict, shared_user: UserData, auth_cassette: Cassette | None) -> OAuthClient:
+    """OAuth клиент с учетными данными shared пользователя - нужен HTTP клиентам для обновления токена"""
+    return OAuthClient(
+        config=environment, username=shared_user.username, password=shared_user.password, cassette=auth_cassette
+    )
+
+
+@pytest.fixture(scope="session")
+def token_cache(request, user_pool: UserPool | None, auth_cassette: Cassette | None) -> TokenCache | None:
+    """
+    Файловый кэш токенов shared_user, если его есть с кем делить: пользователи пула (provision,
+    другой воркер или прошлый запуск) и pre-login контроллера. shared_user с timestamp уникален
+    на воркер и запуск - для него кэш ничего не дает. С кассетой логин всегда идет через OAuth клиент,
+    чтобы обмен был записан/воспроизведен
+    """
+    if auth_cassette or (user_pool is None and prelogged_user(request.config) is None):
+        return None
+    return TokenCache()
+
+
+@pytest.fixture(scope="session")
+def api_token(
+        environment: dict,
+        shared_user: UserData,
+        oauth_client: OAuthClient,
+        token_cache: TokenCache | None,
+        auth_cassette: Cassette | None
+) -> str:
+    """
+    Получает токен для API через полный цикл OAuth 2.0 (или из файлового кэша, пока он не истек)
+    """
+    def fetch_token(expired: OAuthToken | None) -> OAuthToken:
+        # Истекающий токен из кэша с refresh_token обновляем без повторного логина
+        if expired and expired.refresh_token:
+            oauth_client.use_token(expired)
+            try:
+                oauth_client.refresh()
+                return oauth_client.token_data
+            except Exception:
+                pass
         try:
-            token = oauth_client.get_token(shared_user.username, shared_user.password)
+            oauth_client.get_token(shared_user.username, shared_user.password)
         except Exception:
-            # Если логин не удался, значит пользователя нет. Регистрируем его через UI.
-            with sync_playwright() as p:
-                browser = p.chromium.launch(headless=True)
-                page = browser.new_page()
-                login_page = LoginPage(page, environment)
-                auth_actions = AuthActions(login_page)
-                auth_actions.register_user(shared_user.username, shared_user.password)
-                browser.close()
+            # Если логин не удался, значит пользователя нет. Регистрируем его по HTTP, без браузера.
+            register_user_http(environment, shared_user, cassette=auth_cassette)
             # Повторяем попытку получения токена
-            token = oauth_client.get_token(shared_user.username, shared_user.password)
+            oauth_client.get_token(shared_user.username, shared_user.password)
+        return oauth_client.token_data
 
-        allure.attach(f"Токен получен: {token[:15]}...", name="API Access Token")
-        return token
+    with allure.step("[S] Получение API токена через OAuth 2.0 PKCE"):
+        if token_cache:
+            token_data = token_cache.get_or_fetch(environment["auth_url"], shared_user.username, fetch_token)
+        else:
+            token_data = fetch_token(None)
+        oauth_client.use_token(token_data)
+        allure.attach(f"Токен получен: {token_data.access_token[:15]}...", name="API Access Token")
+        return token_data.access_token
 
 
 @pytest.fixture
-def spends_client(environment: dict, api_token: str) -> SpendsHttpClient:
-    """Фикстура для HTTP клиента, использующая токен, полученный по OAuth"""
+def spends_client(
+        environment: dict,
+        api_token: str,
+        oauth_client: OAuthClient,
+        token_cache: TokenCache | None,
+        api_cassette: Cassette | None
+) -> SpendsHttpClient:
+    """
+    Фикстура для HTTP клиента с токеном, полученным по OAuth (с обновлением на 401).
+    Токен берется из oauth_client, а не из api_token: после обновления в прошлом тесте api_token устарел
+    """
     with allure.step("[F] Initialize Spends HTTP Client"):
-        client = SpendsHttpClient(environment['gateway_url'], token=api_token)
+        client = SpendsHttpClient(
+            environment['gateway_url'], token=oauth_client.token, oauth_client=oauth_client,
+            token_cache=token_cache, cassette=api_cassette
+        )
         return client
+
+
+@pytest.fixture(scope="session")
+def anyio_backend() -> str:
+    """Бэкенд для async тестов и фикстур (плагин anyio, ставится вместе с httpx)"""
+    return "asyncio"
+
+
+@pytest.fixture
+async def async_spends_client(
+        environment: dict,
+        api_token: str,
+        oauth_client: OAuthClient,
+        token_cache: TokenCache | None,
+        api_cassette: Cassette | None
+) -> AsyncGenerator[AsyncSpendsHttpClient, None]:
+    """
+    Асинхронный HTTP клиент с общим пулом соединений.
+    Используется в тестах с маркером @pytest.mark.anyio
+    """
+    with allure.step("[F] Initialize Async Spends HTTP Client"):
+        client = AsyncSpendsHttpClient(
+            environment['gateway_url'],
+            token=oauth_client.token,
+            max_connections=int(os.getenv("HTTP_MAX_CONNECTIONS", "20")),
+            max_keepalive_connections=int(os.getenv("HTTP_MAX_KEEPALIVE_CONNECTIONS", "10")),
+            oauth_client=oauth_client,
+            token_cache=token_cache,
+            cassette=api_cassette,
+        )
+    async with client:
+        yield client
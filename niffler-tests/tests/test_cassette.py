@@ -0,0 +1,96 @@
+import asyncio
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import allure
+import httpx
+import pytest
+import requests
+from clients.cassette import Cassette, CassetteAdapter, CassetteMode, CassetteTransport
+
+SESSION_COOKIE = "JSESSIONID=abc123; Path=/; HttpOnly"
+# Запятая в expires: склеенный через запятую Set-Cookie не разобрать обратно
+XSRF_COOKIE = "XSRF-TOKEN=xsrf456; Expires=Wed, 21 Oct 2099 07:28:00 GMT; Path=/"
+
+
+class _LoginHandler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        self.rfile.read(int(self.headers["Content-Length"]))
+        body = json.dumps({"username": "cassette_user"}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Set-Cookie", SESSION_COOKIE)
+        self.send_header("Set-Cookie", XSRF_COOKIE)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def login_server():
+    """Локальный HTTP сервер: POST /login отдает JSON и два Set-Cookie"""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _LoginHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_port}"
+    server.shutdown()
+    server.server_close()
+
+
+def _requests_session(cassette: Cassette) -> requests.Session:
+    session = requests.Session()
+    session.mount("http://", CassetteAdapter(cassette))
+    return session
+
+
+@allure.feature("HTTP cassette")
+class TestCassette:
+    """Запись HTTP обменов в кассету и воспроизведение без сети"""
+
+    @allure.story("requests: запись и воспроизведение")
+    def test_requests_record_replay(self, login_server, tmp_path):
+        """Воспроизведенный ответ совпадает с записанным, cookies попадают в jar сессии"""
+        path = tmp_path / "login.json"
+
+        with allure.step("Запись обмена с локальным сервером"):
+            cassette = Cassette(path, CassetteMode.RECORD)
+            recorded = _requests_session(cassette).post(f"{login_server}/login", data={"username": "cassette_user"})
+            cassette.save()
+            assert recorded.json() == {"username": "cassette_user"}
+
+        with allure.step("Воспроизведение без сервера"):
+            session = _requests_session(Cassette(path, CassetteMode.REPLAY))
+            replayed = session.post("http://127.0.0.1:1/login", data={"username": "other_user"})
+
+        assert replayed.status_code == 200
+        assert replayed.json() == {"username": "cassette_user"}, "Тело ответа отличается от записанного"
+        assert replayed.cookies.get("JSESSIONID") == "abc123", "Cookies нет в воспроизведенном ответе"
+        assert session.cookies.get("JSESSIONID") == "abc123", "Cookie сессии не попала в jar"
+        assert session.cookies.get("XSRF-TOKEN") == "xsrf456", "Cookie с запятой в expires не попала в jar"
+
+    @allure.story("httpx: запись и воспроизведение")
+    def test_httpx_record_replay(self, login_server, tmp_path):
+        """CassetteTransport отдает записанные Set-Cookie отдельными заголовками"""
+        path = tmp_path / "login.json"
+
+        async def post(cassette: Cassette, base_url: str) -> tuple[httpx.Response, httpx.Cookies]:
+            async with httpx.AsyncClient(transport=CassetteTransport(cassette)) as client:
+                response = await client.post(f"{base_url}/login", data={"username": "cassette_user"})
+                return response, client.cookies
+
+        with allure.step("Запись обмена с локальным сервером"):
+            cassette = Cassette(path, CassetteMode.RECORD)
+            recorded, _ = asyncio.run(post(cassette, login_server))
+            cassette.save()
+            assert recorded.headers.get_list("set-cookie") == [SESSION_COOKIE, XSRF_COOKIE]
+
+        with allure.step("Воспроизведение без сервера"):
+            replayed, cookies = asyncio.run(post(Cassette(path, CassetteMode.REPLAY), "http://127.0.0.1:1"))
+
+        assert replayed.json() == {"username": "cassette_user"}, "Тело ответа отличается от записанного"
+        assert cookies.get("JSESSIONID") == "abc123", "Cookie сессии не попала в клиент"
+        assert cookies.get("XSRF-TOKEN") == "xsrf456", "Cookie с запятой в expires не попала в клиент"
@@ -0,0 +1,38 @@
+from typing import NamedTuple
+
+import allure
+from data_bases.copy_stream import CopyStream
+
+
+class _Row(NamedTuple):
+    id: int
+    description: str | None
+
+
+@allure.feature("COPY FROM STDIN")
+class TestCopyStream:
+    """Текстовый формат COPY, в котором SpendDb.load_dataset передает строки в Postgres"""
+
+    @allure.story("Экранирование спецсимволов")
+    def test_escapes_special_characters(self):
+        """Таб, перевод строки, CR и обратный слэш экранируются, None - \\N"""
+        stream = CopyStream([_Row(1, "tab\there\nnew line\r\nwindows\\path"), _Row(2, None)])
+
+        assert stream.read() == b"1\ttab\\there\\nnew line\\r\\nwindows\\\\path\n2\t\\N\n"
+        assert stream.count == 2
+
+    @allure.story("Чтение частями")
+    def test_read_in_chunks(self):
+        """Строки генерируются по мере чтения, части склеиваются в тот же поток"""
+        rows = (_Row(i, f"spend {i}") for i in range(100))
+        stream = CopyStream(rows)
+
+        first = stream.read(10)
+        assert len(first) == 10
+        assert stream.count == 1, "Прочитано больше строк, чем нужно для первой части"
+
+        chunks = [first]
+        while chunk := stream.read(64):
+            chunks.append(chunk)
+        assert b"".join(chunks) == b"".join(f"{i}\tspend {i}\n".encode() for i in range(100))
+        assert stream.count == 100
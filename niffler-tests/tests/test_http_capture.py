@@ -0,0 +1,85 @@
+import random
+
+import allure
+import pytest
+from clients import http_capture
+from clients.http_capture import CapturePolicy, HttpCapture
+
+
+@pytest.fixture
+def attachments(monkeypatch) -> list[tuple[str, str]]:
+    """Перехват allure.attach в http_capture: (name, body) каждого attachment"""
+    attached = []
+    monkeypatch.setattr(http_capture.allure, "attach", lambda body, name=None, **kwargs: attached.append((name, body)))
+    return attached
+
+
+@allure.feature("HTTP capture")
+class TestHttpCapture:
+    """Политики выгрузки HTTP обменов в Allure"""
+
+    @allure.story("on_failure: буфер до падения теста")
+    def test_on_failure_buffers_until_flush(self, attachments):
+        """Успешные обмены не выгружаются, пока тест не упал (flush_pending), и вытесняются из буфера"""
+        capture = HttpCapture(CapturePolicy.ON_FAILURE, buffer_size=2)
+
+        with allure.step("Успешные запросы только буферизуются"):
+            for i in range(3):
+                capture.record("get", f"http://gateway/api/{i}", None, 200, b"{}")
+            assert attachments == [], "Успешный обмен выгружен до падения теста"
+            assert [exchange.url for exchange in capture.pending] == ["http://gateway/api/1", "http://gateway/api/2"], \
+                "Буфер не ограничен buffer_size"
+
+        with allure.step("Ошибка запроса выгружается сразу"):
+            capture.record("post", "http://gateway/api/fail", {"a": 1}, 500, b'{"error": 1}')
+            assert ("POST URL", "http://gateway/api/fail") in attachments
+            attachments.clear()
+
+        with allure.step("flush_pending выгружает буфер"):
+            capture.flush_pending()
+            assert [body for name, body in attachments if name == "GET URL"] == \
+                   ["http://gateway/api/1", "http://gateway/api/2"]
+            assert not capture.pending, "Буфер не очищен после выгрузки"
+
+    @allure.story("on_failure: тест прошел - ничего не выгружено")
+    def test_on_failure_drops_on_passing_test(self, attachments):
+        """Без flush_pending (тест прошел) буфер уходит вместе с клиентом, в Allure ничего не попадает"""
+        capture = HttpCapture(CapturePolicy.ON_FAILURE)
+        capture.record("get", "http://gateway/api/spends/all", None, 200, b"[]")
+        del capture
+        assert attachments == []
+
+    @allure.story("truncated: обрезка тела")
+    def test_truncated_cuts_body(self, attachments):
+        """Тело ответа обрезается до max_bytes с пометкой о полном размере"""
+        capture = HttpCapture(CapturePolicy.TRUNCATED, max_bytes=10)
+        capture.record("get", "http://gateway/api/spends/all", None, 200, b"x" * 100)
+
+        response = dict(attachments)["Response"]
+        assert response.startswith("x" * 10 + "\n")
+        assert "x" * 11 not in response
+        assert "всего 100 байт" in response
+
+    @allure.story("sampled: доля выгружаемых запросов")
+    def test_sampled_respects_rate(self, attachments):
+        """С seed выборка воспроизводима и близка к sample_rate; ошибки выгружаются всегда"""
+        capture = HttpCapture(CapturePolicy.SAMPLED, sample_rate=0.2, rng=random.Random(42))
+        for i in range(1000):
+            capture.record("get", f"http://gateway/api/{i}", None, 200, b"{}")
+
+        sampled = [body for name, body in attachments if name == "GET URL"]
+        assert 150 <= len(sampled) <= 250, f"Выгружено {len(sampled)} из 1000 при rate 0.2"
+        assert len(capture.pending) == capture.pending.maxlen, "Не попавшие в выборку обмены не буферизуются"
+
+        with allure.step("Тот же seed - та же выборка"):
+            attachments.clear()
+            again = HttpCapture(CapturePolicy.SAMPLED, sample_rate=0.2, rng=random.Random(42))
+            for i in range(1000):
+                again.record("get", f"http://gateway/api/{i}", None, 200, b"{}")
+            assert [body for name, body in attachments if name == "GET URL"] == sampled
+
+        with allure.step("Ошибка выгружается вне выборки"):
+            attachments.clear()
+            never = HttpCapture(CapturePolicy.SAMPLED, sample_rate=0.0)
+            never.record("get", "http://gateway/api/fail", None, 503, b"")
+            assert ("GET URL", "http://gateway/api/fail") in attachments
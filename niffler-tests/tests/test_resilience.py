@@ -0,0 +1,146 @@
+import uuid
+from types import SimpleNamespace
+
+import allure
+import pytest
+from clients import resilience
+from clients.resilience import Resilience
+from exceptions import CircuitOpenError
+
+
+class FakeClock:
+    """Подмена time в clients.resilience: sleep только сдвигает monotonic и запоминает паузы"""
+
+    def __init__(self):
+        self.now = 1000.0
+        self.sleeps: list[float] = []
+
+    def monotonic(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+class StubTransport:
+    """Отдает заранее заданные статусы (или исключения) по очереди и считает вызовы"""
+
+    def __init__(self, *outcomes):
+        self.outcomes = list(outcomes)
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        outcome = self.outcomes.pop(0) if len(self.outcomes) > 1 else self.outcomes[0]
+        if isinstance(outcome, Exception):
+            raise outcome
+        status, headers = outcome if isinstance(outcome, tuple) else (outcome, {})
+        return SimpleNamespace(status_code=status, headers=headers)
+
+
+@pytest.fixture
+def clock(monkeypatch) -> FakeClock:
+    fake = FakeClock()
+    monkeypatch.setattr(resilience, "time", fake)
+    return fake
+
+
+def make_resilience(**kwargs) -> Resilience:
+    """Отдельный сервис на тест - breaker из реестра не делится между тестами"""
+    return Resilience(f"test-{uuid.uuid4().hex[:8]}", **kwargs)
+
+
+@allure.feature("HTTP resilience")
+class TestResilience:
+    """Повторы, backoff и circuit breaker на заглушке транспорта"""
+
+    @allure.story("Повтор GET на 502/503")
+    def test_get_retried_on_5xx(self, clock):
+        send = StubTransport(502, 503, 200)
+        response = make_resilience(max_retries=3).call("GET", send)
+
+        assert response.status_code == 200
+        assert send.calls == 3, "GET не повторился на 502/503"
+        assert len(clock.sleeps) == 2
+
+    @allure.story("Повторы ограничены max_retries")
+    def test_get_gives_up_after_max_retries(self, clock):
+        send = StubTransport(503)
+        response = make_resilience(max_retries=2, failure_threshold=100).call("GET", send)
+
+        assert response.status_code == 503, "После исчерпания повторов возвращается последний ответ"
+        assert send.calls == 3
+
+    @allure.story("POST не повторяется")
+    def test_post_not_retried(self, clock):
+        send = StubTransport(503, 200)
+        response = make_resilience(max_retries=3).call("POST", send)
+
+        assert response.status_code == 503
+        assert send.calls == 1, "POST повторен без retryable=True"
+        assert clock.sleeps == []
+
+    @allure.story("Сетевая ошибка GET повторяется")
+    def test_transport_error_retried(self, clock):
+        send = StubTransport(ConnectionError("reset"), 200)
+        assert make_resilience().call("GET", send).status_code == 200
+        assert send.calls == 2
+
+    @allure.story("Circuit breaker открывается после порога")
+    def test_breaker_opens_and_short_circuits(self, clock):
+        client = make_resilience(max_retries=0, failure_threshold=3, reset_timeout=30)
+        send = StubTransport(500)
+
+        with allure.step("3 ошибки подряд открывают breaker"):
+            for _ in range(3):
+                client.call("GET", send)
+            assert client.breaker.opened_at is not None
+
+        with allure.step("Следующий запрос не отправляется"):
+            with pytest.raises(CircuitOpenError) as error:
+                client.call("GET", send)
+            assert send.calls == 3, "Запрос ушел при открытом breaker"
+            assert error.value.retry_in == pytest.approx(30)
+
+    @allure.story("Half-open: пробный запрос закрывает breaker")
+    def test_half_open_probe_closes_breaker(self, clock):
+        client = make_resilience(max_retries=0, failure_threshold=2, reset_timeout=10)
+        for _ in range(2):
+            client.call("GET", StubTransport(500))
+        assert client.breaker.opened_at is not None
+
+        with allure.step("После reset_timeout успешный пробный запрос закрывает breaker"):
+            clock.now += 10
+            assert client.call("GET", StubTransport(200)).status_code == 200
+            assert client.breaker.opened_at is None
+            assert client.breaker.failures == 0
+
+        with allure.step("Breaker снова закрыт - одна ошибка его не открывает"):
+            client.call("GET", StubTransport(500))
+            assert client.breaker.opened_at is None
+
+    @allure.story("Half-open: неудачный пробный запрос снова открывает breaker")
+    def test_half_open_probe_failure_reopens(self, clock):
+        client = make_resilience(max_retries=0, failure_threshold=2, reset_timeout=10)
+        for _ in range(2):
+            client.call("GET", StubTransport(500))
+
+        clock.now += 10
+        client.call("GET", StubTransport(500))
+        with pytest.raises(CircuitOpenError):
+            client.call("GET", StubTransport(200))
+
+    @allure.story("Retry-After учитывается и ограничивается")
+    def test_retry_after_honoured_and_capped(self, clock):
+        client = make_resilience(max_retries=2, backoff_max=5, failure_threshold=100)
+        send = StubTransport((429, {"Retry-After": "2"}), (503, {"Retry-After": "120"}), 200)
+
+        assert client.call("GET", send).status_code == 200
+        assert clock.sleeps == [2.0, 5.0], "Retry-After не учтен или не ограничен backoff_max"
+
+    @allure.story("Backoff без Retry-After - full jitter")
+    def test_backoff_full_jitter_bounds(self):
+        client = make_resilience(backoff_base=0.5, backoff_max=3)
+        for attempt in range(6):
+            assert 0 <= client.delay(attempt) <= min(3, 0.5 * 2 ** attempt)
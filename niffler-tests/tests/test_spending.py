@@ -1,12 +1,34 @@
+from datetime import date
 from components.forms.spending_form import SpendingFormComponent
 from actions.spending_actions import SpendingActions
+from builders.spend_dataset_builder import SpendDatasetBuilder
 from builders.spending_builder import SpendingBuilder
-from exceptions import ValidationError
+from builders.user_builder import UserBuilder
+from exceptions import DatabaseError, ValidationError
+from models.data_models import Category, Spend
 from pages.main_page import MainPage
 from pages.spending_page import SpendingPage
-from sqlmodel import Session, text
+from sqlmodel import delete, Session, text
 import allure
+import pytest
 import random
+import threading
+import uuid
+
+
+def _insert_category_with_spends(db, username: str, amounts: list[float]) -> tuple[str, list[str]]:
+    """Категория пользователя с тратами на суммы amounts напрямую в БД - (category_id, [spend_id])"""
+    category_id = str(uuid.uuid4())
+    spend_ids = [str(uuid.uuid4()) for _ in amounts]
+    with db.session() as session:
+        session.add(Category(id=category_id, name=f"Delete {category_id[:8]}", username=username))
+        session.add_all([
+            Spend(id=spend_id, username=username, spend_date=date.today(), currency="RUB", amount=amount,
+                  description="Delete spend", category_id=category_id)
+            for spend_id, amount in zip(spend_ids, amounts)
+        ])
+        session.commit()
+    return category_id, spend_ids
 
 
 @allure.feature("БД проверки трат")
@@ -25,8 +47,9 @@ class TestSpendingDatabase:
                                                              600).with_random_currency() \
                 .with_random_category().with_random_description().build()
 
-        with allure.step("Запоминаем начальное количество трат"):
-            initial_count = len(spend_db.get_user_spends(logged_in_user.username))
+        with allure.step("Запоминаем начальное состояние трат"):
+            initial_count = spend_db.count_spends(logged_in_user.username)
+            snapshot = spend_db.snapshot(logged_in_user.username)
 
         with allure.step("Создание траты через UI"):
             success = spending_actions.create_spending(
@@ -38,18 +61,15 @@ class TestSpendingDatabase:
             assert success, "Не удалось создать трату через UI"
 
         with allure.step("БД проверка - трата сохранилась с корректными данными"):
-            current_count = len(spend_db.get_user_spends(logged_in_user.username))
+            current_count = spend_db.wait_for_spend_count(logged_in_user.username, initial_count + 1)
             assert current_count == initial_count + 1, "Счетчик трат не увеличился"
 
-            # Находим созданную трату
-            all_spends = spend_db.get_user_spends(logged_in_user.username)
-            found_spend = None
-            for spend in all_spends:
-                if spend.description == test_data.description and spend.amount == test_data.amount:
-                    found_spend = spend
-                    break
-
-            assert found_spend is not None, "Трата не найдена в БД"
+            # Сравниваем только новые строки, а не всю историю пользователя
+            diff = spend_db.diff(snapshot)
+            assert len(diff.added) == 1 and not diff.removed and not diff.changed, f"Неожиданные изменения: {diff}"
+            found_spend = diff.added[0]
+            assert found_spend.description == test_data.description, "Трата не найдена в БД"
+            assert found_spend.amount == test_data.amount, "Некорректная сумма в БД"
             assert found_spend.currency == test_data.currency, "Некорректная валюта в БД"
 
     @allure.story("Счетчики БД при операциях")
@@ -68,7 +88,7 @@ class TestSpendingDatabase:
                 .with_random_category().with_random_description().build()
 
         with allure.step("Начальное количество"):
-            initial_count = len(spend_db.get_user_spends(logged_in_user.username))
+            initial_count = spend_db.count_spends(logged_in_user.username)
 
         with allure.step("Создаем 2 траты через UI"):
             # Первая трата
@@ -84,7 +104,7 @@ class TestSpendingDatabase:
             assert success2, "Вторая трата не создалась"
 
         with allure.step("БД проверка - счетчик +2"):
-            final_count = len(spend_db.get_user_spends(logged_in_user.username))
+            final_count = spend_db.wait_for_spend_count(logged_in_user.username, initial_count + 2)
             assert final_count == initial_count + 2, f"Ожидали +2 траты, получили {final_count - initial_count}"
 
     @allure.story("Валидация не пропускает в БД")
@@ -97,22 +117,23 @@ class TestSpendingDatabase:
         spending_actions = SpendingActions(spending_page)
 
         with allure.step("Начальное состояние БД"):
-            initial_count = len(spend_db.get_user_spends(logged_in_user.username))
+            initial_count = spend_db.count_spends(logged_in_user.username)
 
         with allure.step("Попытка создать невалидную трату"):
             errors_shown = spending_actions.try_create_invalid_spending()
             assert errors_shown, "Валидация не сработала"
 
         with allure.step("БД проверка - невалидные данные НЕ сохранились"):
-            current_count = len(spend_db.get_user_spends(logged_in_user.username))
+            current_count = spend_db.count_spends(logged_in_user.username)
             assert current_count == initial_count, "Невалидные данные попали в БД!"
 
     @allure.story("Существующие траты в БД")
+    @pytest.mark.query_budget(max_queries=1)
     def test_existing_spends_in_db(self, spend_db, logged_in_user):
         """Проверяем что можем читать существующие траты из БД"""
 
         with allure.step("Получение всех трат пользователя"):
-            user_spends = spend_db.get_user_spends(logged_in_user.username)
+            user_spends = spend_db.spend_rows(logged_in_user.username)
 
         with allure.step("БД проверка - структура данных корректна"):
             # Проверяем что каждая трата имеет нужные поля
@@ -124,6 +145,146 @@ class TestSpendingDatabase:
                 assert hasattr(spend, 'category_id'), "У траты нет category_id"
                 assert spend.username == logged_in_user.username, "Неверный username в трате"
 
+    @allure.story("Изолированная транзакция БД")
+    def test_isolated_db_writes(self, isolated_spend_db):
+        """Проверяем запись и агрегаты внутри транзакции, которая откатывается после теста"""
+        # Пользователь только для БД: тесту не нужен ни логин, ни пользователь в auth
+        username = UserBuilder().with_random_credentials().build().username
+        category_id = str(uuid.uuid4())
+        with allure.step("Вставка категории и траты напрямую в БД"):
+            initial_count = isolated_spend_db.count_spends(username)
+            snapshot = isolated_spend_db.snapshot(username)
+            with isolated_spend_db.session() as session:
+                session.add(Category(id=category_id, name=f"Isolated {category_id[:8]}", username=username))
+                session.add(Spend(id=str(uuid.uuid4()), username=username, spend_date=date.today(),
+                                  currency="RUB", amount=123.0, description="Isolated spend", category_id=category_id))
+                session.commit()
+
+        with allure.step("БД проверка - запись видна внутри транзакции"):
+            assert isolated_spend_db.count_spends(username) == initial_count + 1
+            assert isolated_spend_db.exists_spend(username, category_id=category_id, amount=123.0)
+            diff = isolated_spend_db.diff(snapshot)
+            assert [spend.category_id for spend in diff.added] == [category_id], f"Неожиданный diff: {diff}"
+
+    @allure.story("Изолированная транзакция БД")
+    def test_isolated_db_writes_invisible_outside(self, spend_db, isolated_spend_db):
+        """Записи isolated() не видны через spend_db, пока тест держит транзакцию открытой"""
+        username = UserBuilder().with_random_credentials().build().username
+        category_id = str(uuid.uuid4())
+        with allure.step("Вставка категории и траты в изолированной транзакции"):
+            with isolated_spend_db.session() as session:
+                session.add(Category(id=category_id, name=f"Isolated {category_id[:8]}", username=username))
+                session.add(Spend(id=str(uuid.uuid4()), username=username, spend_date=date.today(),
+                                  currency="RUB", amount=1.0, description="Isolated spend", category_id=category_id))
+                session.commit()
+
+        with allure.step("БД проверка - другое соединение пула не видит незафиксированную запись"):
+            assert isolated_spend_db.count_spends(username) == 1
+            assert spend_db.count_spends(username) == 0, "Запись изолированной транзакции видна вне ее"
+
+    @allure.story("Ожидание записи в БД")
+    def test_wait_for_spend_count_polls_until_insert(self, spend_db):
+        """wait_for_spend_count дожидается траты, которую другой поток вставляет во время ожидания"""
+        username = UserBuilder().with_random_credentials().build().username
+        category_id = str(uuid.uuid4())
+
+        def insert_spend():
+            with spend_db.session() as session:
+                session.add(Category(id=category_id, name=f"Wait {category_id[:8]}", username=username))
+                session.add(Spend(id=str(uuid.uuid4()), username=username, spend_date=date.today(),
+                                  currency="RUB", amount=1.0, description="Wait spend", category_id=category_id))
+                session.commit()
+
+        try:
+            with allure.step("Нулевое ожидание выполнено сразу"):
+                assert spend_db.wait_for_spend_count(username, 0, timeout=1) == 0
+
+            with allure.step("Вставка траты из другого потока во время ожидания"):
+                inserter = threading.Timer(0.3, insert_spend)
+                inserter.start()
+                try:
+                    assert spend_db.wait_for_spend_count(username, 1, timeout=5) == 1
+                    assert spend_db.wait_for_spend(username, category_id=category_id, timeout=1)
+                finally:
+                    inserter.join()
+        finally:
+            spend_db.purge_user(username)
+
+    @allure.story("Удаление данных в БД")
+    def test_delete_spends_counts(self, isolated_spend_db):
+        """delete_spends удаляет только переданные траты и возвращает их количество"""
+        username = UserBuilder().with_random_credentials().build().username
+        _, spend_ids = _insert_category_with_spends(isolated_spend_db, username, [10.0, 20.0, 30.0])
+
+        with allure.step("Удаление двух трат из трех и несуществующего ID"):
+            assert isolated_spend_db.delete_spends([*spend_ids[:2], str(uuid.uuid4())], username) == 2
+            assert isolated_spend_db.delete_spends([], username) == 0
+
+        with allure.step("БД проверка - осталась только третья трата"):
+            assert [str(spend.id) for spend in isolated_spend_db.spend_rows(username)] == spend_ids[2:]
+
+    @allure.story("Удаление данных в БД")
+    def test_delete_categories_removes_spends_first(self, isolated_spend_db):
+        """delete_categories удаляет траты раньше категорий: в обратном порядке DELETE упирается в FK"""
+        username = UserBuilder().with_random_credentials().build().username
+        category_id, _ = _insert_category_with_spends(isolated_spend_db, username, [10.0, 20.0])
+        other_category_id, other_spend_ids = _insert_category_with_spends(isolated_spend_db, username, [5.0])
+
+        with allure.step("Категория с тратами не удаляется раньше трат"):
+            with pytest.raises(DatabaseError):
+                isolated_spend_db._delete_in_transaction({
+                    "categories": delete(Category).where(Category.id == category_id),
+                    "spends": delete(Spend).where(Spend.category_id == category_id),
+                }, "delete_categories", username)
+            assert isolated_spend_db.count_spends(username) == 3, "Частичное удаление не откатилось"
+
+        with allure.step("Удаление категории вместе с ее тратами"):
+            counts = isolated_spend_db.delete_categories([category_id], username)
+            assert counts == {"spends": 2, "categories": 1}
+            assert isolated_spend_db.delete_categories([], username) == {"spends": 0, "categories": 0}
+
+        with allure.step("БД проверка - другая категория и ее трата не затронуты"):
+            categories = isolated_spend_db.get_user_categories(username)
+            assert [str(category.id) for category in categories] == [other_category_id]
+            assert [str(spend.id) for spend in isolated_spend_db.spend_rows(username)] == other_spend_ids
+
+    @allure.story("Удаление данных в БД")
+    def test_purge_user_counts(self, isolated_spend_db):
+        """purge_user удаляет все траты и категории пользователя и только их"""
+        username = UserBuilder().with_random_credentials().build().username
+        other_username = UserBuilder().with_random_credentials().build().username
+        _insert_category_with_spends(isolated_spend_db, username, [10.0, 20.0])
+        _insert_category_with_spends(isolated_spend_db, username, [30.0])
+        _insert_category_with_spends(isolated_spend_db, other_username, [40.0])
+
+        with allure.step("Удаление данных пользователя"):
+            assert isolated_spend_db.purge_user(username) == {"spends": 3, "categories": 2}
+
+        with allure.step("БД проверка - данные пользователя удалены, другого - нет"):
+            assert isolated_spend_db.count_spends(username) == 0
+            assert isolated_spend_db.get_user_categories(username) == []
+            assert isolated_spend_db.count_spends(other_username) == 1
+            assert isolated_spend_db.purge_user(username) == {"spends": 0, "categories": 0}
+
+    @allure.story("Большой набор данных в БД")
+    def test_generated_dataset_aggregates(self, isolated_spend_db):
+        """Проверяем загрузку детерминированного набора трат и агрегаты по нему"""
+        dataset = SpendDatasetBuilder(f"dataset_{uuid.uuid4().hex[:8]}", seed=2024).with_spends(10_000)
+
+        with allure.step("Загрузка 10 000 трат одним потоком"):
+            counts = isolated_spend_db.load_dataset(dataset.categories(), dataset.spends(), username=dataset.username)
+            assert counts == {"categories": len(dataset.categories()), "spends": 10_000}
+
+        with allure.step("БД проверка - агрегаты совпадают с набором"):
+            expected = {}
+            for spend in dataset.spends():
+                expected[spend.currency] = expected.get(spend.currency, 0) + spend.amount
+            assert isolated_spend_db.count_spends(dataset.username) == 10_000
+            actual = isolated_spend_db.sum_by_currency(dataset.username)
+            assert actual.keys() == expected.keys(), "Набор валют не совпадает"
+            for currency, total in expected.items():
+                assert abs(actual[currency] - total) < 0.01, f"Сумма по {currency} не совпадает"
+
     @allure.story("Целостность данных БД")
     def test_data_integrity_check(self, authenticated_page, spend_db, logged_in_user):
         """Проверяем что БД не позволяет нарушить связи между тратами и категориями"""
@@ -134,6 +295,7 @@ class TestSpendingDatabase:
         with allure.step("Создание траты через UI"):
             test_data = SpendingBuilder().with_amount(999).with_currency("EUR").with_category(
                 "IntegrityTestCat").with_description("Integrity test").build()
+            snapshot = spend_db.snapshot(logged_in_user.username)
 
             success = spending_actions.create_spending(
                 test_data.amount, test_data.currency, test_data.category, test_data.description
@@ -141,12 +303,11 @@ class TestSpendingDatabase:
             assert success, "Не удалось создать трату через UI"
 
         with allure.step("БД проверка: найти связь трата-категория"):
-            user_spends = spend_db.get_user_spends(logged_in_user.username)
-            target_spend = None
-            for spend in user_spends:
-                if spend.description == test_data.description:
-                    target_spend = spend
-                    break
+            spend_db.wait_for_spend(logged_in_user.username, description=test_data.description)
+            # Описание повторяется между запусками - берем именно созданную сейчас трату
+            target_spend = next(
+                (spend for spend in spend_db.diff(snapshot).added if spend.description == test_data.description), None
+            )
 
             assert target_spend is not None, "Трата не найдена в БД"
             assert target_spend.category_id is not None, "У траты нет category_id"
@@ -319,14 +480,14 @@ class TestSpending:
         spending_actions = SpendingActions(spending_page)
 
         with allure.step("Запоминаем начальное состояние БД"):
-            initial_count = len(spend_db.get_user_spends(logged_in_user.username))
+            initial_count = spend_db.count_spends(logged_in_user.username)
 
         with allure.step("Попытка сохранения с дефолтными значениями (amount=0, пустая category)"):
             errors_shown = spending_actions.try_create_invalid_spending()
             assert errors_shown, "Форма пропустила валидацию пустых полей"
 
         with allure.step("БД проверка - невалидные данные не сохранились"):
-            current_count = len(spend_db.get_user_spends(logged_in_user.username))
+            current_count = spend_db.count_spends(logged_in_user.username)
             assert current_count == initial_count, "Невалидные данные попали в БД!"
 
         with allure.step("Исправление ошибок"):
@@ -376,9 +537,8 @@ class TestSpending:
                 allure.attach(f"Ошибка очистки: {str(e)}", name="Cleanup error")
 
     @allure.story("Навигация на страницу трат")
-    def test_navigation_to_spending(self, authenticated_page):
+    def test_navigation_to_spending(self, main_page):
         """Проверяем переход на страницу трат с главной страницы"""
-        main_page = MainPage(authenticated_page)
         spending_actions = SpendingActions(main_page)
 
         with allure.step("Проверка что находимся на главной странице"):
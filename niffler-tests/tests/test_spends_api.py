@@ -0,0 +1,71 @@
+import asyncio
+import allure
+import pytest
+from datetime import date
+from builders.spending_builder import SpendingBuilder
+from models.data_models import SpendAdd
+
+
+@allure.feature("API трат")
+class TestSpendsApi:
+    """Тесты HTTP клиентов gateway"""
+
+    @allure.story("Параллельные запросы через async клиент")
+    @pytest.mark.anyio
+    async def test_async_client_parallel_reads(self, async_spends_client, spends_client):
+        """Проверяем что параллельные запросы async клиента возвращают те же данные, что и sync клиент"""
+        with allure.step("Параллельное получение категорий и трат"):
+            categories, spends = await asyncio.gather(
+                async_spends_client.get_categories(),
+                async_spends_client.get_spends(),
+            )
+
+        with allure.step("Сравнение с sync клиентом"):
+            assert {c.id for c in categories} == {c.id for c in spends_client.get_categories()}, \
+                "Категории async и sync клиентов не совпадают"
+            assert {s.id for s in spends} == {s.id for s in spends_client.get_spends()}, \
+                "Траты async и sync клиентов не совпадают"
+
+    @allure.story("Bulk создание трат")
+    def test_bulk_add_spends(self, spends_client, spend_db):
+        """Проверяем что bulk добавление возвращает результаты в порядке входных данных"""
+        with allure.step("Генерация тестовых данных"):
+            test_data = [
+                SpendingBuilder().with_category("Bulk").with_description(f"Bulk spend {i}").build()
+                for i in range(20)
+            ]
+            spends = [
+                SpendAdd(
+                    amount=data.amount,
+                    description=data.description,
+                    category=data.category,
+                    spendDate=date.today().isoformat(),
+                    currency=data.currency
+                )
+                for data in test_data
+            ]
+
+        with allure.step("Bulk добавление трат"):
+            results = spends_client.add_spends_bulk(spends, concurrency=5)
+
+        try:
+            with allure.step("Проверка результатов"):
+                assert all(r.ok for r in results), f"Ошибки bulk добавления: {[r.error for r in results if not r.ok]}"
+                assert [r.result.description for r in results] == [s.description for s in spends], \
+                    "Порядок результатов не совпадает с порядком входных данных"
+        finally:
+            with allure.step("Удаление созданных трат и категории Bulk"):
+                # У gateway нет удаления категорий - категорию и ее траты удаляем в БД
+                bulk_category_ids = [c.id for c in spends_client.get_categories() if c.name == "Bulk"]
+                spend_db.delete_categories(bulk_category_ids)
+
+    @allure.story("Постраничное чтение трат")
+    def test_iter_spends_matches_full_list(self, spends_client):
+        """Проверяем что постраничный обход /api/v2/spends возвращает те же траты, что и полный список"""
+        with allure.step("Постраничный обход с маленькой страницей"):
+            paged_ids = [spend.id for spend in spends_client.iter_spends(page_size=2)]
+
+        with allure.step("Сравнение с /api/spends/all"):
+            assert len(paged_ids) == len(set(paged_ids)), "Траты повторяются на разных страницах"
+            assert set(paged_ids) == {spend.id for spend in spends_client.get_spends()}, \
+                "Постраничный обход вернул другой набор трат"
@@ -0,0 +1,155 @@
+import json
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable
+from urllib.parse import urlsplit
+
+import allure
+from playwright.sync_api import Browser, BrowserContext, Error as PlaywrightError, Page
+
+# Восстанавливает localStorage origin до состояния из storage_state: все лишние ключи удаляются
+_RESET_STORAGE_SCRIPT = """(auth) => {
+    localStorage.clear();
+    sessionStorage.clear();
+    for (const [name, value] of Object.entries(auth)) localStorage.setItem(name, value);
+}"""
+
+
+def _origin(url: str) -> str | None:
+    parts = urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc}" if parts.scheme in ("http", "https") else None
+
+
+@dataclass
+class PooledContext:
+    """Контекст из пула и то, что нужно для его сброса"""
+    context: BrowserContext
+    state_key: str | None
+    cookies: list = field(default_factory=list)
+    local_storage: dict[str, dict[str, str]] = field(default_factory=dict)  # origin -> {name: value}
+    visited_origins: set[str] = field(default_factory=set)
+    uses: int = 0
+
+
+class ContextPool:
+    """
+    Пул прогретых BrowserContext на воркер
+
+    Контекст создается один раз на storage_state (пользователя) и переиспользуется между тестами.
+    При возврате сбрасывается: закрываются страницы, снимаются route, разрешения, cookies и localStorage
+    возвращаются к состоянию из storage_state. Если сбросить нельзя (тест ушел на origin, страницы которого
+    уже закрыты, или тест упал), либо контекст использован max_uses раз - он закрывается.
+    """
+
+    def __init__(
+            self,
+            browser: Browser,
+            context_options: dict,
+            timeout: int,
+            max_uses: int = 20,
+            setup: Callable[[BrowserContext], None] | None = None
+    ):
+        self.browser = browser
+        self.context_options = context_options
+        self.timeout = timeout
+        self.max_uses = max_uses
+        # Вызывается для нового контекста и после каждого сброса (например, установка route профиля сети)
+        self.setup = setup
+        self._idle: dict[str | None, list[PooledContext]] = {}
+        self._in_use: dict[BrowserContext, PooledContext] = {}
+
+    @staticmethod
+    def _key(storage_state: Path | None) -> str | None:
+        return str(Path(storage_state).resolve()) if storage_state else None
+
+    def _create(self, storage_state: Path | None) -> PooledContext:
+        options = dict(self.context_options)
+        state = {}
+        if storage_state:
+            state = json.loads(Path(storage_state).read_text(encoding="utf-8"))
+            options["storage_state"] = state
+        context = self.browser.new_context(**options)
+        context.set_default_timeout(self.timeout)
+        pooled = PooledContext(
+            context=context,
+            state_key=self._key(storage_state),
+            cookies=state.get("cookies", []),
+            local_storage={
+                origin["origin"]: {item["name"]: item["value"] for item in origin.get("localStorage", [])}
+                for origin in state.get("origins", [])
+            },
+        )
+        context.on("page", lambda page: self._track(pooled, page))
+        if self.setup:
+            self.setup(context)
+        return pooled
+
+    @staticmethod
+    def _track(pooled: PooledContext, page: Page) -> None:
+        """Запоминаем origin всех переходов - их localStorage нужно будет сбросить"""
+        def on_navigated(frame) -> None:
+            if frame == page.main_frame and (origin := _origin(frame.url)):
+                pooled.visited_origins.add(origin)
+
+        page.on("framenavigated", on_navigated)
+
+    def acquire(self, storage_state: Path | None = None) -> BrowserContext:
+        """Контекст для storage_state (None - без авторизации): свободный из пула или новый"""
+        idle = self._idle.setdefault(self._key(storage_state), [])
+        pooled = idle.pop() if idle else self._create(storage_state)
+        pooled.uses += 1
+        self._in_use[pooled.context] = pooled
+        allure.attach(f"Использований контекста: {pooled.uses}/{self.max_uses}", name="Context Pool")
+        return pooled.context
+
+    def release(self, context: BrowserContext, recycle: bool = False) -> None:
+        """Вернуть контекст в пул после сброса или закрыть его"""
+        pooled = self._in_use.pop(context)
+        if recycle or pooled.uses >= self.max_uses or not self._reset(pooled):
+            self._close(pooled)
+            return
+        self._idle.setdefault(pooled.state_key, []).append(pooled)
+
+    def _reset(self, pooled: PooledContext) -> bool:
+        """Сброс состояния контекста; False - сбросить полностью нельзя"""
+        context = pooled.context
+        try:
+            pages_by_origin = {_origin(page.url): page for page in context.pages}
+            for origin in pooled.visited_origins:
+                page = pages_by_origin.get(origin)
+                if page is None:
+                    return False
+                page.evaluate(_RESET_STORAGE_SCRIPT, pooled.local_storage.get(origin, {}))
+            for page in context.pages:
+                page.close()
+            context.unroute_all(behavior="ignoreErrors")
+            context.clear_permissions()
+            context.clear_cookies()
+            if pooled.cookies:
+                context.add_cookies(pooled.cookies)
+            context.set_default_timeout(self.timeout)
+            if self.setup:
+                self.setup(context)
+        except PlaywrightError:
+            return False
+        pooled.visited_origins.clear()
+        return True
+
+    @staticmethod
+    def _close(pooled: PooledContext) -> None:
+        try:
+            pooled.context.close()
+        except PlaywrightError:
+            pass
+
+    def invalidate(self, storage_state: Path | None) -> None:
+        """Закрыть свободные контексты storage_state (например, после повторного логина)"""
+        for pooled in self._idle.pop(self._key(storage_state), []):
+            self._close(pooled)
+
+    def close(self) -> None:
+        """Закрыть все контексты пула"""
+        for pooled in [*self._in_use.values(), *(p for idle in self._idle.values() for p in idle)]:
+            self._close(pooled)
+        self._idle.clear()
+        self._in_use.clear()
@@ -0,0 +1,73 @@
+import base64
+import json
+import re
+from dataclasses import dataclass, field
+from urllib.parse import parse_qs, urlsplit
+
+from playwright.sync_api import BrowserContext, Route
+
+# Прозрачный PNG 1x1: <img> остается видимым (ненулевой размер), но картинка не скачивается и не декодируется
+_PLACEHOLDER_PNG = base64.b64decode(
+    "iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAQAAAC1HAwCAAAAC0lEQVR42mNkYAAAAAYAAjCB0C8AAAAASUVORK5CYII="
+)
+
+# Предфильтр по расширению: в обработчик route попадают только похожие на ассеты запросы,
+# остальные идут в сеть без круга через Playwright driver
+_ASSET_URL = re.compile(r"\.(png|jpe?g|gif|webp|avif|svg|ico|woff2?|ttf|otf|eot|mp4|webm|ogg|mp3|wav)(\?|$)", re.I)
+
+_CURRENCIES = ("RUB", "USD", "EUR", "KZT")
+
+
+def _empty_statistic(route: Route) -> None:
+    """Пустая статистика вместо /api/v2/stat/total - ее считает gateway через niffler-currency"""
+    currency = parse_qs(urlsplit(route.request.url).query).get("statCurrency", [""])[0]
+    if currency not in _CURRENCIES:
+        # Фильтр ALL - фронтенд передает пустую/undefined валюту, статистика тогда в валюте пользователя
+        currency = "RUB"
+    route.fulfill(
+        status=200,
+        content_type="application/json",
+        body=json.dumps({"total": 0.0, "currency": currency, "statByCategories": []}),
+    )
+
+
+@dataclass(frozen=True)
+class NetProfile:
+    """
+    Профиль сети браузер контекста: какие ресурсы не грузить и какие запросы API подменять
+
+    placeholder_types - ресурсы, на которые отдается заглушка (картинки: элемент остается на странице),
+    blocked_types - ресурсы, которые обрываются (шрифты, медиа), stubs - {url glob: обработчик route}
+    """
+    name: str
+    placeholder_types: frozenset[str] = frozenset()
+    blocked_types: frozenset[str] = frozenset()
+    stubs: dict = field(default_factory=dict)
+
+    def _handle_asset(self, route: Route) -> None:
+        resource_type = route.request.resource_type
+        if resource_type in self.placeholder_types:
+            route.fulfill(status=200, content_type="image/png", body=_PLACEHOLDER_PNG)
+        elif resource_type in self.blocked_types:
+            route.abort("blockedbyclient")
+        else:
+            # Например, svg импортированный как JS модуль в dev сборке Vite
+            route.fallback()
+
+    def install(self, context: BrowserContext) -> None:
+        """Установка route профиля на контекст (route теста, добавленные позже, имеют приоритет)"""
+        if self.placeholder_types or self.blocked_types:
+            context.route(_ASSET_URL, self._handle_asset)
+        for url, handler in self.stubs.items():
+            context.route(url, handler)
+
+
+NET_PROFILES = {
+    "full": NetProfile("full"),
+    "lean": NetProfile(
+        "lean",
+        placeholder_types=frozenset({"image"}),
+        blocked_types=frozenset({"font", "media"}),
+        stubs={"**/api/v2/stat/total*": _empty_statistic},
+    ),
+}